@@ -14,6 +14,7 @@ import os
 import pygame
 import queue
 import random
+import re
 import sys
 import time
 from dataclasses import dataclass, asdict
@@ -213,6 +214,25 @@ def get_palette_by_category(category: str):
 
 # ==================== CORE CLASSES ====================
 
+AGE_HIST_MAX = 255  # Предел корзин гистограммы возраста (для слоёв без предела возраста — тоже)
+
+@dataclass
+class LayerStats:
+    """
+    Статистика слоя — побочный продукт старения и шага, без пересчёта сетки.
+
+    population < 0 — неизвестно (сетку меняли в обход шага), см. layer_population();
+    age_hist — возрасты живых клеток на проходе старения, последняя корзина
+    собирает min(max_age, AGE_HIST_MAX) и старше.
+    """
+    population: int = -1
+    births: int = 0
+    deaths: int = 0
+    age_hist: Optional[np.ndarray] = None
+
+    def invalidate(self):
+        self.population = -1
+
 @dataclass
 class Layer:
     """Слой клеточного автомата с настройками"""
@@ -220,7 +240,7 @@ class Layer:
                  rms_mode="brightness", blend_mode="normal", rms_enabled=True,
                  alpha_live=220, alpha_old=140, max_age=60, mix="Normal",
                  solo=False, mute=False, palette_mix=0.5, spawn_method="Стабильные блоки", spawn_percent=100, aging_speed=1.0,
-                 invert_age_palette=False, invert_rms_palette=False):
+                 invert_age_palette=False, invert_rms_palette=False, engine="dense", topology="bounded", tick_ms=0):
         self.grid = grid
         self.age = age
         self.rule = rule
@@ -238,11 +258,22 @@ class Layer:
         self.mute = mute
         self.palette_mix = palette_mix
         self.spawn_method = spawn_method
-        self.tick_ms = DEFAULT_TICK_MS
+        self.tick_ms = max(0, int(tick_ms or 0))  # Собственный интервал тика; 0 — глобальные часы App
+        self.tick_accum = 0.0  # Накопитель времени собственных часов слоя
         self.spawn_percent = spawn_percent  # Процент спавна клеток (0-300%)
         self.aging_speed = aging_speed  # Скорость старения
         self.invert_age_palette = invert_age_palette 
         self.invert_rms_palette = invert_rms_palette 
+        self.engine = engine if engine in CA_ENGINES else "dense"  # "dense" | "bitboard"
+        self.topology = topology if topology in CA_TOPOLOGIES else "bounded"  # "bounded" | "torus"
+        self.stepper = LifeStepper()  # Постоянные буферы шага автомата
+        self.tiles = ActiveTiles()  # Карта активных плиток
+        self.state = None  # uint8-состояния для правил Generations, иначе None
+        self.stats = LayerStats()  # Население, рождения, смерти, гистограмма возраста
+        self.generation = 0  # Счётчик изменений сетки/возраста, см. touch_layer()
+        self.alpha_mask = None  # Кэш альфы клеток для RenderManager
+        self.alpha_key = None
+        self.color_cache = None  # LayerColorCache, создаётся при первой отрисовке
 # ==================== HUD ===================
 
 class HUD:
@@ -281,10 +312,7 @@ class HUD:
         # Доступные опции для выпадающих списков
         palette_options = PALETTE_OPTIONS
         
-        rule_options = [
-            "Conway", "HighLife", "Day&Night", "Replicator", 
-            "Seeds", "Maze", "Coral", "LifeWithoutDeath", "Gnarl"
-        ]
+        rule_options = list(CA_RULES)
         
         blend_options = ["normal", "additive", "screen", "multiply", "overlay"]
         rms_mode_options = ["brightness", "palette", "disabled"]
@@ -296,8 +324,9 @@ class HUD:
             "Смешанный",
             "Линии",
             "Кресты",
-            "Кольца"
-        ]
+            "Кольца",
+            LIBRARY_SPAWN_METHOD,
+        ] + [PATTERN_SPAWN_PREFIX + name for name in pattern_library().file_names]
         
         module_height = 280  # Высота каждого модуля
         module_spacing = 20   # Отступ между модулями
@@ -1083,6 +1112,251 @@ def apply_outline(surface: pygame.Surface, thickness: int = 1):
     edge = (mag > 64)
     arr[edge] = [255, 255, 255]
 
+
+# Смещения dither по классу позиции [y % 2, x % 2] (как в apply_dither)
+DITHER_OFFSETS = np.array([[0, 0.5], [0.75, 0.25]]) * 16 - 8
+
+
+class FXPipeline:
+    """
+    FX-цепочка за одну блокировку canvas.
+
+    Эффекты идут в порядке ORDER, как в прежней цепочке apply_*. Соседние
+    поточечные (trails, posterize, dither, scanlines) сливаются в одну таблицу
+    на 256 значений для каждого класса позиции (y % 2, x % 2) и применяются
+    одним проходом по байтам canvas. Буферы и промежуточные Surface постоянные.
+    Поддерживается 32-битный canvas без альфы, иначе — прежние apply_*.
+    """
+
+    ORDER = ('trails', 'blur', 'bloom', 'posterize', 'dither', 'scanlines', 'pixelate', 'outline')
+    POINTWISE = ('trails', 'posterize', 'dither', 'scanlines')
+
+    def __init__(self):
+        self._plan_key = None
+        self._plan: List[Tuple[str, Any]] = []
+        self._format_key = None
+        self._buffers: Dict[Any, Any] = {}
+
+    # --- план ---
+
+    @staticmethod
+    def _fx_param(fx: Dict[str, Any], name: str):
+        if name == 'trails':
+            return float(fx.get('trail_strength', 0.06))
+        if name == 'blur':
+            return int(fx.get('blur_scale', 2))
+        if name == 'bloom':
+            return float(fx.get('bloom_strength', 0.35))
+        if name == 'posterize':
+            return max(2, int(fx.get('poster_levels', 5)))
+        if name == 'scanlines':
+            return clamp01(float(fx.get('scan_strength', 0.25)))
+        if name == 'pixelate':
+            return max(1, int(fx.get('pixel_block', 1)))
+        if name == 'outline':
+            return max(1, int(fx.get('outline_thick', 1)))
+        return None
+
+    @staticmethod
+    def _compose(luts: np.ndarray, name: str, param) -> np.ndarray:
+        """Добавляет поточечный эффект к таблицам (2, 2, 256) [y % 2, x % 2, значение]"""
+        if name == 'trails':
+            fade = max(0.0, min(1.0, 1.0 - param))
+            return (luts * fade).astype(np.uint8)
+        if name == 'posterize':
+            step = 255 // (param - 1)
+            q = (luts.astype(np.int32) + step // 2) // step
+            return np.clip(q * step, 0, 255).astype(np.uint8)
+        if name == 'dither':
+            return np.clip(luts + DITHER_OFFSETS[:, :, None], 0, 255).astype(np.uint8)
+        if name == 'scanlines':
+            luts = luts.copy()
+            luts[:, 1] = (luts[:, 1].astype(np.float32) * (1.0 - 0.5 * param)).astype(np.uint8)
+            return luts
+        return luts
+
+    def plan(self, fx: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Список стадий: ('lut', таблицы) для слитых поточечных и (имя, параметр) для остальных"""
+        try:
+            key = tuple(sorted(fx.items()))
+        except TypeError:
+            key = None
+        if key is not None and key == self._plan_key:
+            return self._plan
+        stages: List[Tuple[str, Any]] = []
+        luts = None
+        for name in self.ORDER:
+            if not fx.get(name, False):
+                continue
+            param = self._fx_param(fx, name)
+            if name in ('trails', 'scanlines', 'bloom') and param <= 0:
+                continue
+            if name in ('blur', 'pixelate') and param <= 1:
+                continue
+            if name in self.POINTWISE:
+                if luts is None:
+                    luts = np.broadcast_to(np.arange(256, dtype=np.uint8), (2, 2, 256)).copy()
+                luts = self._compose(luts, name, param)
+                continue
+            if luts is not None:
+                stages.append(('lut', luts))
+                luts = None
+            stages.append((name, param))
+        if luts is not None:
+            stages.append(('lut', luts))
+        self._plan_key, self._plan = key, stages
+        return stages
+
+    # --- буферы ---
+
+    def _scratch_surface(self, surface: pygame.Surface, name: str, size: Tuple[int, int]) -> pygame.Surface:
+        key = ('surf', name, size)
+        surf = self._buffers.get(key)
+        if surf is None:
+            surf = self._buffers[key] = pygame.Surface(size, 0, surface)
+        return surf
+
+    def _scratch(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        key = ('arr', name, shape, np.dtype(dtype).str)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = np.empty(shape, dtype=dtype)
+        return buf
+
+    @staticmethod
+    def _bytes(surface: pygame.Surface) -> np.ndarray:
+        """Байты пикселей (H, W, 4); блокирует Surface, пока вид жив"""
+        w, h = surface.get_size()
+        raw = np.frombuffer(surface.get_buffer(), dtype=np.uint8).reshape(h, surface.get_pitch())
+        return raw[:, :w * 4].reshape(h, w, 4)
+
+    def _channels(self, surface: pygame.Surface) -> Tuple[int, int, int]:
+        """Индексы байтов R, G, B в пикселе"""
+        fmt = (surface.get_shifts(), sys.byteorder)
+        if fmt != self._format_key:
+            self._format_key = fmt
+            self._rgb = tuple(s // 8 if sys.byteorder == 'little' else 3 - s // 8
+                              for s in surface.get_shifts()[:3])
+        return self._rgb
+
+    # --- стадии ---
+
+    def _apply_lut(self, px: np.ndarray, luts: np.ndarray):
+        if (luts == luts[0, 0]).all():
+            np.take(luts[0, 0], px, out=px)
+            return
+        # Таблицы зависят от позиции: индекс = значение + 256 * класс (постоянная карта классов)
+        offsets = self._buffers.get(('class_offsets', px.shape))
+        if offsets is None:
+            offsets = np.empty(px.shape, dtype=np.uint16)
+            for cy in (0, 1):
+                for cx in (0, 1):
+                    offsets[cy::2, cx::2] = (cy * 2 + cx) * 256
+            self._buffers[('class_offsets', px.shape)] = offsets
+        index = self._scratch('lut_index', px.shape, np.uint16)
+        np.add(px, offsets, out=index)
+        np.take(luts.reshape(-1), index, out=px)
+
+    def _rescaled(self, surface: pygame.Surface, name: str, k: int, smooth: bool) -> pygame.Surface:
+        """surface, уменьшенная в k раз и растянутая обратно, в постоянный Surface"""
+        w, h = surface.get_size()
+        small_size = (max(1, w // k), max(1, h // k))
+        scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        small = self._scratch_surface(surface, name, small_size)
+        big = self._scratch_surface(surface, 'full', (w, h))
+        scale(surface, small_size, small)
+        scale(small, (w, h), big)
+        return big
+
+    def _luminance(self, px: np.ndarray, rgb: Tuple[int, int, int]) -> np.ndarray:
+        lum = self._scratch('lum', px.shape[:2], np.float64)
+        tmp = self._scratch('lum_tmp', px.shape[:2], np.float64)
+        np.multiply(px[..., rgb[0]], 0.2126, out=lum)
+        np.multiply(px[..., rgb[1]], 0.7152, out=tmp)
+        lum += tmp
+        np.multiply(px[..., rgb[2]], 0.0722, out=tmp)
+        lum += tmp
+        return lum
+
+    def _bloom(self, surface: pygame.Surface, px: np.ndarray, rgb, strength: float):
+        bright = self._luminance(px, rgb) > 180
+        if not bright.any():
+            return
+        # Свечение только в ярких пикселях: размытая копия × strength, добавленная с той же силой
+        blurred = self._bytes(self._rescaled(surface, 'bloom', 4, True))
+        lit = self._scratch('bloom_lit', bright.shape, np.float32)
+        glow = self._scratch('bloom_glow', bright.shape, np.uint8)
+        s = np.float32(strength)
+        for c in rgb:
+            np.multiply(blurred[..., c], s, out=lit)
+            np.copyto(glow, lit, casting='unsafe')
+            np.multiply(glow, s, out=lit)
+            lit += px[..., c]
+            np.clip(lit, 0, 255, out=lit)
+            np.copyto(px[..., c], lit, casting='unsafe', where=bright)
+
+    def _outline(self, px: np.ndarray, rgb, thickness: int):
+        gray = self._scratch('gray', px.shape[:2], np.float32)
+        np.copyto(gray, self._luminance(px, rgb), casting='same_kind')
+        mag = self._scratch('mag', gray.shape, np.float32)
+        tmp = self._scratch('tmp', gray.shape, np.float32)
+        mag.fill(0.0)
+        np.subtract(gray[1:, :], gray[:-1, :], out=tmp[1:, :])
+        np.abs(tmp[1:, :], out=mag[1:, :])
+        np.subtract(gray[:, 1:], gray[:, :-1], out=tmp[:, 1:])
+        np.abs(tmp[:, 1:], out=tmp[:, 1:])
+        mag[:, 1:] += tmp[:, 1:]
+        np.minimum(mag, 255, out=mag)
+        for _ in range(thickness - 1):
+            np.copyto(tmp, mag)
+            np.maximum(mag[:-1, :], tmp[1:, :], out=mag[:-1, :])
+            np.maximum(mag[1:, :], tmp[:-1, :], out=mag[1:, :])
+            np.maximum(mag[:, :-1], tmp[:, 1:], out=mag[:, :-1])
+            np.maximum(mag[:, 1:], tmp[:, :-1], out=mag[:, 1:])
+        px[mag > 64] = 255
+
+    def apply(self, surface: pygame.Surface, fx: Dict[str, Any]):
+        stages = self.plan(fx)
+        if not stages:
+            return
+        if surface.get_bytesize() != 4 or surface.get_masks()[3] != 0:
+            apply_fx_chain(surface, fx)
+            return
+        rgb = self._channels(surface)
+        px = self._bytes(surface)
+        for name, param in stages:
+            if name == 'lut':
+                self._apply_lut(px, param)
+            elif name == 'blur':
+                np.copyto(px, self._bytes(self._rescaled(surface, 'blur', param, True)))
+            elif name == 'pixelate':
+                np.copyto(px, self._bytes(self._rescaled(surface, 'pixelate', param, False)))
+            elif name == 'bloom':
+                self._bloom(surface, px, rgb, param)
+            elif name == 'outline':
+                self._outline(px, rgb, param)
+        del px  # снимаем блокировку Surface
+
+
+def apply_fx_chain(surface: pygame.Surface, fx: Dict[str, Any]):
+    """Цепочка эффектов по одному, для Surface без 32-битного формата"""
+    if fx.get('trails', False):
+        apply_trails(surface, float(fx.get('trail_strength', 0.06)))
+    if fx.get('blur', False):
+        apply_scale_blur(surface, int(fx.get('blur_scale', 2)))
+    if fx.get('bloom', False):
+        apply_bloom(surface, float(fx.get('bloom_strength', 0.35)))
+    if fx.get('posterize', False):
+        apply_posterize(surface, int(fx.get('poster_levels', 5)))
+    if fx.get('dither', False):
+        apply_dither(surface)
+    if fx.get('scanlines', False):
+        apply_scanlines(surface, float(fx.get('scan_strength', 0.25)))
+    if fx.get('pixelate', False):
+        apply_pixelate(surface, int(fx.get('pixel_block', 1)))
+    if fx.get('outline', False):
+        apply_outline(surface, int(fx.get('outline_thick', 1)))
+
 try:
     import pygame
 except ImportError as e:
@@ -1119,9 +1393,23 @@ FIELD_OFFSET_X = 0
 # Cellular automaton rules
 CA_RULES = [
     "Conway", "HighLife", "Day&Night", "Replicator", 
-    "Seeds", "Maze", "Coral", "LifeWithoutDeath", "Gnarl"
+    "Seeds", "Maze", "Coral", "LifeWithoutDeath", "Gnarl",
+    "Brian's Brain", "Star Wars",
+    "Bosco's Rule", "Majority", "Waffle", "Bugsmovie"
 ]
 
+# Движки шага автомата: "dense" — NumPy по клеткам, "bitboard" — 64 клетки на слово.
+# HashLife (step_life_hashlife) считает бесконечное поле и движком слоя не служит:
+# на тике сетку правят спавн, чистка краёв и зеркалирование
+CA_ENGINES = ["dense", "bitboard"]
+
+# Перемотка слоя по клавише F (App.fast_forward_layer): 2^10 поколений обычными шагами
+FAST_FORWARD_LOG2 = 10
+FAST_FORWARD_TIME_BUDGET = 2.0  # с: дольше перемотка прерывается, слой остаётся прежним
+
+# Топология поля слоя: "bounded" — за краем мёртвые клетки, "torus" — края склеены
+CA_TOPOLOGIES = ["bounded", "torus"]
+
 # Available color palettes grouped by category
 # Унифицированная система палитр - устранено дублирование
 PALETTE_NAMES = [
@@ -1194,6 +1482,8 @@ DEFAULT_COLOR_RMS_MAX = 0.30
 DEFAULT_TICK_MS = 60
 DEFAULT_PTICK_MIN_MS = 60
 DEFAULT_PTICK_MAX_MS = 200
+MAX_CATCHUP_STEPS = 4      # Предел поколений за кадр при догоне отставшего времени
+SIM_RATE_WINDOW_MS = 1000  # Окно замера фактической скорости симуляции
 
 # Pitch-based coloring
 PITCH_COLOR_MIN_HZ = 72.0
@@ -1251,6 +1541,49 @@ def _cached_hsv_to_rgb(h: float, s: float, v: float) -> tuple[int, int, int]:
     r, g, b = colorsys.hsv_to_rgb((h % 360) / 360.0, clamp01(s), clamp01(v))
     return (int(r * 255), int(g * 255), int(b * 255))
 
+# Счётчики векторной конверсии HSV → RGB (для сравнения с попаданиями lru_cache)
+_HSV_ARRAY_STATS = {"calls": 0, "pixels": 0}
+
+def hsv_to_rgb_array(h, s, v) -> np.ndarray:
+    """
+    Векторная конверсия HSV → RGB: h в градусах, s и v в 0..1, любые формы.
+
+    Повторяет colorsys.hsv_to_rgb и усечение int(x*255) из _cached_hsv_to_rgb,
+    поэтому результат совпадает со скалярной версией. Возвращает (..., 3) uint8.
+    """
+    h = np.mod(np.asarray(h, dtype=np.float64), 360.0) / 360.0
+    s = np.clip(np.asarray(s, dtype=np.float64), 0.0, 1.0)
+    v = np.clip(np.asarray(v, dtype=np.float64), 0.0, 1.0)
+    h, s, v = np.broadcast_arrays(h, s, v)
+    h6 = h * 6.0
+    i = h6.astype(np.int64)
+    f = h6 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i %= 6
+    sector = [i == 0, i == 1, i == 2, i == 3, i == 4]
+    out = np.empty(h.shape + (3,), dtype=np.uint8)
+    out[..., 0] = np.select(sector, [v, q, p, p, t], v) * 255
+    out[..., 1] = np.select(sector, [t, v, v, q, p], p) * 255
+    out[..., 2] = np.select(sector, [p, p, t, v, v], q) * 255
+    _HSV_ARRAY_STATS["calls"] += 1
+    _HSV_ARRAY_STATS["pixels"] += h.size
+    return out
+
+def hsv_cache_stats() -> dict:
+    """Статистика скалярного кэша _cached_hsv_to_rgb и векторного пути"""
+    info = _cached_hsv_to_rgb.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": (info.hits / total) if total else 0.0,
+        "currsize": info.currsize,
+        "array_calls": _HSV_ARRAY_STATS["calls"],
+        "array_pixels": _HSV_ARRAY_STATS["pixels"],
+    }
+
 @lru_cache(maxsize=512)
 def _cached_age_to_t(age: int, max_age: int) -> float:
     """Кэшированная функция возраста"""
@@ -1259,53 +1592,9 @@ def _cached_age_to_t(age: int, max_age: int) -> float:
     k = max(6.0, max_age / 6.0)
     return clamp01(1.0 - math.exp(-age / k))
 
-@lru_cache(maxsize=256)
 def _cached_palette_hsv(palette_name: str, t: float) -> tuple[float, float, float]:
-    """Кэшированная генерация HSV для палитр"""
-    t = clamp01(t)
-    PALETTE_FUNCTIONS = {
-        "FIRE": hue_fire_from_t,
-        "OCEAN": hue_ocean_from_t,
-        "NEON": hue_neon_from_t,
-        "UKRAINE": hue_ukraine_from_t,
-        "RAINBOWSMOOTH": hue_rainbow_smooth_from_t,
-        "SUNSET": hue_sunset_from_t,
-        "AURORA": hue_aurora_from_t,
-        "GALAXY": hue_galaxy_from_t,
-        "TROPICAL": hue_tropical_from_t,
-        "VOLCANO": hue_volcano_from_t,
-        "DEEPSEA": hue_deepsea_from_t,
-        "CYBERPUNK": hue_cyberpunk_from_t,
-        "BGYR": lambda t: (hue_bgyr_from_t(t), 0.85, 1.0),
-        "SPRING": hue_spring_from_t,
-        "SUMMER": hue_summer_from_t,
-        "AUTUMN": hue_autumn_from_t,
-        "WINTER": hue_winter_from_t,
-        "ICE": hue_ice_from_t,
-        "FOREST": hue_forest_from_t,
-        "DESERT": hue_desert_from_t,
-        "VIRIDIS": hue_viridis_from_t,
-        "INFERNO": hue_inferno_from_t,
-        "MAGMA": hue_magma_from_t,
-        "PLASMA": hue_plasma_from_t,
-        "CIVIDIS": hue_cividis_from_t,
-        "TWILIGHT": hue_twilight_from_t,
-        "GOLD": hue_gold_from_t,
-        "SILVER": hue_silver_from_t,
-        "COPPER": hue_copper_from_t,
-        "EMERALD": hue_emerald_from_t,
-        "SAPPHIRE": hue_sapphire_from_t,
-        "RUBY": hue_ruby_from_t,
-        "AMETHYST": hue_amethyst_from_t,
-        "SEPIA": hue_sepia_from_t
-    # Добавьте остальные палитры по аналогии
-    }
-    func = PALETTE_FUNCTIONS.get(palette_name.upper())
-    if func:
-        return func(t)
-    # Default fallback
-    hue = hue_bgyr_from_t(t)
-    return (hue, 0.85, 1.0)
+    """HSV палитры по t из реестра палитр (см. PALETTE_REGISTRY)"""
+    return get_palette(palette_name.upper()).hsv(t)
 
 def blend_colors(color1: Tuple[int, int, int], color2: Tuple[int, int, int], 
                 factor: float, blend_mode: str = "normal") -> Tuple[int, int, int]:
@@ -1370,6 +1659,119 @@ def blend_colors(color1: Tuple[int, int, int], color2: Tuple[int, int, int],
     
     return (max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b)))
 
+# Рабочие int32-буферы для blend_colors_array, по ключу (форма, слот)
+_BLEND_WORK_BUFFERS: Dict[tuple, np.ndarray] = {}
+
+def _blend_work(shape: tuple, slot: int) -> np.ndarray:
+    """Переиспользуемый рабочий буфер для смешивания массивов"""
+    key = (shape, slot)
+    buf = _BLEND_WORK_BUFFERS.get(key)
+    if buf is None:
+        buf = np.empty(shape, dtype=np.int32)
+        _BLEND_WORK_BUFFERS[key] = buf
+    return buf
+
+def _div255(x: np.ndarray) -> np.ndarray:
+    """Целочисленное floor(x / 255) на месте; точно для 0 <= x <= 65789"""
+    tmp = x + 1
+    tmp >>= 8
+    x += tmp
+    x += 1
+    x >>= 8
+    return x
+
+def blend_colors_array(base: np.ndarray, over: np.ndarray, factor,
+                       blend_mode: str = "normal",
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Векторный аналог blend_colors для массивов (N,3) или (H,W,3) uint8.
+
+    Формулы режимов те же, что в blend_colors, но в целочисленной арифметике
+    с фиксированной точкой (factor в 1/256), поэтому результат может
+    отличаться от скалярной версии на 1-3 единицы младшего разряда.
+
+    Args:
+        base: Базовые цвета (..., 3) uint8
+        over: Цвета для смешивания, транслируются к форме base (например (3,))
+        factor: Фактор смешивания 0.0-1.0: число или массив формы base.shape[:-1]
+        blend_mode: "normal", "additive", "screen", "multiply", "overlay"
+        out: Массив (..., 3) uint8 для результата (может совпадать с base)
+
+    Returns:
+        out или новый массив uint8
+    """
+    shape = base.shape
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+
+    # Фактор в фиксированной точке 0..256
+    if np.ndim(factor) == 0:
+        f = int(round(clamp01(float(factor)) * 256.0))
+    else:
+        f = _blend_work(shape[:-1] + (1,), 2)
+        factor = np.clip(np.asarray(factor, dtype=np.float32), 0.0, 1.0)
+        np.multiply(factor.reshape(f.shape), 256.0, out=f, casting='unsafe')
+
+    b = _blend_work(shape, 0)
+    o = _blend_work(shape, 1)
+    np.copyto(b, base, casting='unsafe')
+    np.copyto(o, np.broadcast_to(over, shape), casting='unsafe')
+
+    if blend_mode == "additive":
+        o *= f
+        o >>= 8
+        b += o
+    elif blend_mode == "screen":
+        # 255 - (255-a)*(255-b*f)/255
+        o *= f
+        o >>= 8
+        np.subtract(255, o, out=o)
+        np.subtract(255, b, out=b)
+        b *= o
+        _div255(b)
+        np.subtract(255, b, out=b)
+    elif blend_mode == "multiply":
+        # a * (b*f*f/255 + (1-f))
+        if np.ndim(f) == 0:
+            f2 = (f * f) >> 8
+        else:
+            f2 = f * f
+            f2 >>= 8
+        o *= b
+        o *= f2
+        o >>= 8
+        _div255(o)
+        b *= (256 - f)
+        b >>= 8
+        b += o
+    elif blend_mode == "overlay":
+        # overlay(a, b*f), затем lerp(a, overlay, f)
+        o *= f
+        o >>= 8
+        low = o * b
+        low <<= 1
+        _div255(low)
+        high = 255 - o
+        high *= (255 - b)
+        high <<= 1
+        _div255(high)
+        np.subtract(255, high, out=high)
+        np.copyto(o, np.where(b < 128, low, high))
+        o -= b
+        o *= f
+        o >>= 8
+        b += o
+    else:
+        # normal и fallback: линейная интерполяция
+        o -= b
+        o *= f
+        o >>= 8
+        b += o
+
+    np.clip(b, 0, 255, out=b)
+    np.copyto(out, b, casting='unsafe')
+    return out
+
 # -------------------- Палитры и возраст/выцветание --------------------
 def hue_bgyr_from_t(t: float) -> float:
     t = clamp01(t)
@@ -1887,6 +2289,258 @@ def hue_sepia_from_t(t: float) -> tuple[float, float, float]:
     v = lerp(0.9, 0.6, t)
     return h, s, v
 
+# -------------------- Векторные версии палитр --------------------
+# Массивные аналоги hue_*_from_t: t — массив, результат — массивы той же формы.
+# Арифметика повторяет скалярные функции, чтобы цвета совпадали.
+
+def _t_array(t) -> np.ndarray:
+    return np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0)
+
+def _const_array(t: np.ndarray, value: float) -> np.ndarray:
+    return np.full(t.shape, value, dtype=np.float64)
+
+def _piecewise_array(t: np.ndarray, bounds: tuple, pieces: list) -> np.ndarray:
+    """Кусочная функция: pieces[i] при t < bounds[i], последний кусок — иначе"""
+    pieces = [np.broadcast_to(p, t.shape) for p in pieces]
+    return np.select([t < b for b in bounds], pieces[:-1], pieces[-1])
+
+def hue_bgyr_from_t_array(t) -> np.ndarray:
+    t = _t_array(t)
+    return _piecewise_array(t, (1/3, 2/3), [lerp(220.0, 120.0, t*3.0),
+                                          lerp(120.0, 60.0, (t-1/3)*3.0),
+                                          lerp(60.0, 0.0, (t-2/3)*3.0)])
+
+def hue_br_from_t_array(t) -> np.ndarray:
+    return lerp(220.0, 0.0, _t_array(t))
+
+def hue_bronze_from_t_array(t):
+    t = _t_array(t)
+    return 30.0 + 15.0 * t, 0.7 + 0.1 * t, 0.7 + 0.2 * t
+
+def hue_pearl_from_t_array(t):
+    t = _t_array(t)
+    return 0.0 + 10.0 * t, 0.05 + 0.15 * t, 1.0 - 0.1 * t
+
+def hue_coral_from_t_array(t):
+    t = _t_array(t)
+    return 10.0 + 20.0 * t, 0.8 - 0.1 * t, 0.9 - 0.1 * t
+
+def hue_jade_from_t_array(t):
+    t = _t_array(t)
+    return 140.0 + 20.0 * t, 0.7 + 0.1 * t, 0.8 + 0.1 * t
+
+def hue_topaz_from_t_array(t):
+    t = _t_array(t)
+    return 50.0 + 70.0 * t, 0.7 + 0.2 * t, 0.9 - 0.1 * t
+
+def hue_gold_from_t_array(t):
+    t = _t_array(t)
+    return 47.0 + 25.0 * t, 0.85 - 0.15 * t, 1.0 - 0.1 * t
+
+def hue_silver_from_t_array(t):
+    t = _t_array(t)
+    return _const_array(t, 0.0), 0.0 + 0.05 * t, 1.0 - 0.3 * t
+
+def hue_copper_from_t_array(t):
+    t = _t_array(t)
+    return 18.0 + 18.0 * t, 0.8 - 0.1 * t, 0.9 - 0.2 * t
+
+def hue_emerald_from_t_array(t):
+    t = _t_array(t)
+    return (0.33 + 0.07 * t) * 360.0, 0.85 - 0.1 * t, 1.0 - 0.1 * t
+
+def hue_sapphire_from_t_array(t):
+    t = _t_array(t)
+    return (0.58 + 0.07 * t) * 360.0, 0.85 - 0.1 * t, 1.0 - 0.1 * t
+
+def hue_ruby_from_t_array(t):
+    t = _t_array(t)
+    return (0.97 - 0.07 * t) * 360.0, 0.85 - 0.1 * t, 1.0 - 0.1 * t
+
+def hue_amethyst_from_t_array(t):
+    t = _t_array(t)
+    return (0.76 + 0.07 * t) * 360.0, 0.85 - 0.1 * t, 1.0 - 0.1 * t
+
+def hue_sepia_from_t_array(t):
+    t = _t_array(t)
+    return _const_array(t, 30.0), lerp(0.5, 0.2, t), lerp(0.9, 0.6, t)
+
+def hue_grayscale_from_t_array(t):
+    t = _t_array(t)
+    return _const_array(t, 0.0), _const_array(t, 0.0), 1.0 - t
+
+def hue_red_darkred_gray_black_from_t_array(t):
+    t = _t_array(t)
+    b = (0.33, 0.66)
+    s = _piecewise_array(t, b, [1.0, 0.5 - (t-0.33)*1.5, 0.0])
+    v = _piecewise_array(t, b, [1.0 - t * 0.5, 0.5 - (t-0.33)*0.5, 0.5 - (t-0.66)*1.5])
+    return _const_array(t, 0.0), s, v
+
+def hue_fire_from_t_array(t):
+    t = _t_array(t)
+    b = (0.25, 0.5, 0.75)
+    k2 = (t-0.5)/0.25
+    k3 = (t-0.75)/0.25
+    h = _piecewise_array(t, b, [0.0, 0.0, lerp(20.0, 50.0, k2), 55.0])
+    s = _piecewise_array(t, b, [1.0, 1.0, 1.0, lerp(1.0, 0.0, k3)])
+    v = _piecewise_array(t, b, [lerp(0.05, 0.25, t/0.25), lerp(0.25, 0.6, (t-0.25)/0.25),
+                                lerp(0.6, 0.9, k2), 1.0])
+    return h, s, v
+
+def hue_ocean_from_t_array(t):
+    t = _t_array(t)
+    k0 = t/0.5
+    k1 = (t-0.5)/0.5
+    h = _piecewise_array(t, (0.5,), [lerp(220.0, 200.0, k0), lerp(200.0, 180.0, k1)])
+    s = _piecewise_array(t, (0.5,), [1.0, lerp(1.0, 0.2, k1)])
+    v = _piecewise_array(t, (0.5,), [lerp(0.35, 0.85, k0), lerp(0.85, 1.0, k1)])
+    return h, s, v
+
+def hue_neon_from_t_array(t):
+    t = _t_array(t)
+    h = _piecewise_array(t, (1/3, 2/3), [lerp(285.0, 240.0, t*3.0),
+                                       lerp(240.0, 120.0, (t-1/3)*3.0),
+                                       lerp(120.0, 315.0, (t-2/3)*3.0)])
+    return h, _const_array(t, 1.0), _const_array(t, 1.0)
+
+def hue_ukraine_from_t_array(t):
+    t = _t_array(t)
+    k0 = t/0.5
+    k1 = (t-0.5)/0.5
+    h = _piecewise_array(t, (0.5,), [50.0, lerp(50.0, 220.0, k1)])
+    s = _piecewise_array(t, (0.5,), [lerp(1.0, 0.6, k0), lerp(0.6, 1.0, k1)])
+    v = _piecewise_array(t, (0.5,), [lerp(0.95, 1.0, k0), lerp(1.0, 0.9, k1)])
+    return h, s, v
+
+def hue_spring_from_t_array(t):
+    t = _t_array(t)
+    h = _piecewise_array(t, (0.5,), [90 + t * 60, 150 + (t-0.5)*120])
+    s = _piecewise_array(t, (0.5,), [0.8 + 0.2 * t, 1.0])
+    v = _piecewise_array(t, (0.5,), [0.8 + 0.2 * t, 1.0])
+    return h, s, v
+
+def hue_summer_from_t_array(t):
+    t = _t_array(t)
+    return 50 + t * 40, _const_array(t, 1.0), _const_array(t, 1.0)
+
+def hue_autumn_from_t_array(t):
+    t = _t_array(t)
+    return 30 + t * 30, 0.7 + 0.3 * t, 0.7 + 0.3 * (1-t)
+
+def hue_winter_from_t_array(t):
+    t = _t_array(t)
+    h = _piecewise_array(t, (0.7,), [180 + t * 60, 222.0])
+    s = _piecewise_array(t, (0.7,), [0.5 + 0.5 * (1-t), 0.2])
+    v = _piecewise_array(t, (0.7,), [0.8 + 0.2 * t, 1.0])
+    return h, s, v
+
+def hue_ice_from_t_array(t):
+    t = _t_array(t)
+    return 190 + t * 20, 0.3 + 0.7 * (1-t), 0.9 + 0.1 * t
+
+def hue_forest_from_t_array(t):
+    t = _t_array(t)
+    return 120 + t * 30, 0.7 + 0.3 * (1-t), 0.6 + 0.4 * t
+
+def hue_desert_from_t_array(t):
+    t = _t_array(t)
+    return 40 + t * 20, 0.6 + 0.4 * (1-t), _const_array(t, 0.9)
+
+def hue_viridis_from_t_array(t):
+    t = _t_array(t)
+    h = _piecewise_array(t, (0.5,), [90 + t * 60, 120 + (t-0.5)*120])
+    v = _piecewise_array(t, (0.5,), [0.8 + 0.2 * t, 1.0])
+    return h, _const_array(t, 1.0), v
+
+def hue_inferno_from_t_array(t):
+    t = _t_array(t)
+    return 10 + t * 50, _const_array(t, 1.0), 0.7 + 0.3 * t
+
+def hue_magma_from_t_array(t):
+    t = _t_array(t)
+    return 300 - t * 120, _const_array(t, 1.0), 0.7 + 0.3 * t
+
+def hue_plasma_from_t_array(t):
+    t = _t_array(t)
+    return 240 + t * 60, _const_array(t, 1.0), 0.8 + 0.2 * t
+
+def hue_cividis_from_t_array(t):
+    t = _t_array(t)
+    return 90 + t * 60, 0.8 + 0.2 * t, 0.7 + 0.3 * (1-t)
+
+def hue_twilight_from_t_array(t):
+    t = _t_array(t)
+    return 240 + t * 60, 0.7 + 0.3 * t, 0.8 + 0.2 * (1-t)
+
+def hue_rainbow_smooth_from_t_array(t):
+    t = _t_array(t)
+    return 360.0 * (1.0 - t), _const_array(t, 1.0), _const_array(t, 1.0)
+
+def hue_sunset_from_t_array(t):
+    t = _t_array(t)
+    b = (0.25, 0.5, 0.75)
+    k0, k1, k2, k3 = t / 0.25, (t - 0.25) / 0.25, (t - 0.5) / 0.25, (t - 0.75) / 0.25
+    h = _piecewise_array(t, b, [lerp(280.0, 300.0, k0), lerp(300.0, 320.0, k1),
+                                lerp(320.0, 30.0, k2), lerp(30.0, 60.0, k3)])
+    s = _piecewise_array(t, b, [1.0, lerp(1.0, 0.8, k1), lerp(0.8, 1.0, k2), lerp(1.0, 0.8, k3)])
+    v = _piecewise_array(t, b, [lerp(0.3, 0.6, k0), lerp(0.6, 0.9, k1), lerp(0.9, 1.0, k2), 1.0])
+    return h, s, v
+
+def hue_aurora_from_t_array(t):
+    t = _t_array(t)
+    b = (0.33, 0.66)
+    k0, k1, k2 = t / 0.33, (t - 0.33) / 0.33, (t - 0.66) / 0.34
+    h = _piecewise_array(t, b, [lerp(120.0, 180.0, k0), lerp(180.0, 240.0, k1), lerp(240.0, 300.0, k2)])
+    s = _piecewise_array(t, b, [lerp(1.0, 0.8, k0), lerp(0.8, 1.0, k1), lerp(1.0, 0.9, k2)])
+    v = _piecewise_array(t, b, [lerp(0.7, 1.0, k0), 1.0, lerp(1.0, 0.9, k2)])
+    return h, s, v
+
+def hue_galaxy_from_t_array(t):
+    t = _t_array(t)
+    b = (0.25, 0.5, 0.75)
+    k0, k1, k2, k3 = t / 0.25, (t - 0.25) / 0.25, (t - 0.5) / 0.25, (t - 0.75) / 0.25
+    h = _piecewise_array(t, b, [270.0, lerp(270.0, 250.0, k1), lerp(250.0, 220.0, k2), 220.0])
+    s = _piecewise_array(t, b, [1.0, 1.0, lerp(1.0, 0.7, k2), lerp(0.7, 0.0, k3)])
+    v = _piecewise_array(t, b, [lerp(0.05, 0.3, k0), lerp(0.3, 0.6, k1),
+                                lerp(0.6, 0.9, k2), lerp(0.9, 1.0, k3)])
+    return h, s, v
+
+def hue_tropical_from_t_array(t):
+    t = _t_array(t)
+    b = (0.33, 0.66)
+    k0, k1, k2 = t / 0.33, (t - 0.33) / 0.33, (t - 0.66) / 0.34
+    h = _piecewise_array(t, b, [140.0, lerp(140.0, 120.0, k1), lerp(120.0, 80.0, k2)])
+    s = _piecewise_array(t, b, [1.0, 1.0, lerp(1.0, 0.8, k2)])
+    v = _piecewise_array(t, b, [lerp(0.4, 0.8, k0), lerp(0.8, 1.0, k1), 1.0])
+    return h, s, v
+
+def hue_volcano_from_t_array(t):
+    t = _t_array(t)
+    b = (0.2, 0.4, 0.6, 0.8)
+    k0, k1, k2 = t / 0.2, (t - 0.2) / 0.2, (t - 0.4) / 0.2
+    k3, k4 = (t - 0.6) / 0.2, (t - 0.8) / 0.2
+    h = _piecewise_array(t, b, [0.0, 0.0, lerp(0.0, 30.0, k2), lerp(30.0, 60.0, k3), 60.0])
+    s = _piecewise_array(t, b, [1.0, 1.0, 1.0, lerp(1.0, 0.8, k3), lerp(0.8, 0.0, k4)])
+    v = _piecewise_array(t, b, [lerp(0.05, 0.3, k0), lerp(0.3, 0.8, k1), lerp(0.8, 1.0, k2), 1.0, 1.0])
+    return h, s, v
+
+def hue_deepsea_from_t_array(t):
+    t = _t_array(t)
+    b = (0.33, 0.66)
+    k0, k1, k2 = t / 0.33, (t - 0.33) / 0.33, (t - 0.66) / 0.34
+    h = _piecewise_array(t, b, [240.0, lerp(240.0, 220.0, k1), lerp(220.0, 180.0, k2)])
+    s = _piecewise_array(t, b, [1.0, 1.0, lerp(1.0, 0.8, k2)])
+    v = _piecewise_array(t, b, [lerp(0.05, 0.4, k0), lerp(0.4, 0.8, k1), lerp(0.8, 1.0, k2)])
+    return h, s, v
+
+def hue_cyberpunk_from_t_array(t):
+    t = _t_array(t)
+    b = (0.25, 0.5, 0.75)
+    k0, k1, k2, k3 = t / 0.25, (t - 0.25) / 0.25, (t - 0.5) / 0.25, (t - 0.75) / 0.25
+    h = _piecewise_array(t, b, [280.0, lerp(280.0, 320.0, k1), lerp(320.0, 200.0, k2), lerp(200.0, 120.0, k3)])
+    v = _piecewise_array(t, b, [lerp(0.4, 0.8, k0), lerp(0.8, 1.0, k1), 1.0, 1.0])
+    return h, _const_array(t, 1.0), v
+
 class PaletteState:
     def __init__(self):
         self.hue_offset = 0.0
@@ -2010,6 +2664,113 @@ def apply_hue_offset(hue_deg: float) -> float:
 def maybe_invert_t(t: float) -> float:
     return 1.0 - t if PALETTE_STATE.invert else t
 
+# -------------------- Реестр палитр --------------------
+# Каждый ключ palette_key() соответствует записи реестра. Палитра задаётся либо
+# векторным генератором hue_*_from_t_array, либо опорными точками (t, h, s, v)
+# с линейной интерполяцией. Цвет считается по палитре точно; скалярные запросы
+# кэшируются, массивы вычисляются одним векторным вызовом.
+
+
+class PaletteSpec:
+    """Запись реестра палитр: векторная функция t -> (h, s, v)"""
+
+    def __init__(self, key: str, hsv_func=None, points: Optional[tuple] = None):
+        self.key = key
+        self.hsv_func = hsv_func
+        self.points = None if points is None else np.asarray(points, dtype=np.float64)
+
+    def hsv(self, t: float) -> Tuple[float, float, float]:
+        """HSV для скалярного t"""
+        return _cached_spec_hsv(self.key, clamp01(t))
+
+    def hsv_array(self, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """HSV для массива t"""
+        t = _t_array(t)
+        if self.hsv_func is not None:
+            return self.hsv_func(t)
+        pts = self.points
+        h, s, v = (np.interp(t, pts[:, 0], pts[:, c]) for c in (1, 2, 3))
+        return h, s, v
+
+
+PALETTE_REGISTRY: Dict[str, PaletteSpec] = {}
+
+def register_palette(key: str, hsv_func=None, points: Optional[tuple] = None) -> PaletteSpec:
+    """
+    Регистрирует палитру под ключом palette_key().
+
+    Args:
+        key: Ключ палитры (например "FIRE")
+        hsv_func: Векторная функция t -> (h, s, v)
+        points: Опорные точки ((t, h, s, v), ...) по возрастанию t
+    """
+    if (hsv_func is None) == (points is None):
+        raise ValueError(f"Palette {key}: нужен либо hsv_func, либо points")
+    spec = PaletteSpec(key.upper(), hsv_func, points)
+    PALETTE_REGISTRY[spec.key] = spec
+    _cached_spec_hsv.cache_clear()
+    return spec
+
+@lru_cache(maxsize=4096)
+def _cached_spec_hsv(key: str, t: float) -> Tuple[float, float, float]:
+    """Кэшированный HSV записи реестра для скалярного t"""
+    h, s, v = PALETTE_REGISTRY[key].hsv_array(np.array([t]))
+    return float(h[0]), float(s[0]), float(v[0])
+
+def get_palette(key: str) -> PaletteSpec:
+    """Запись реестра по ключу; неизвестные ключи — BGYR"""
+    return PALETTE_REGISTRY.get(key) or PALETTE_REGISTRY["BGYR"]
+
+def palette_hsv_array(palette_name: str, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Векторная выборка палитры по ключу palette_key(): вся палитра одним вызовом"""
+    return get_palette(palette_name.upper()).hsv_array(t)
+
+# Генераторы
+register_palette("BGYR", lambda t: (hue_bgyr_from_t_array(t), _const_array(_t_array(t), 0.85),
+                                    _const_array(_t_array(t), 1.0)))
+for _key, _func in (
+        ("FIRE", hue_fire_from_t_array), ("OCEAN", hue_ocean_from_t_array),
+        ("NEON", hue_neon_from_t_array), ("UKRAINE", hue_ukraine_from_t_array),
+        ("RAINBOWSMOOTH", hue_rainbow_smooth_from_t_array), ("SUNSET", hue_sunset_from_t_array),
+        ("AURORA", hue_aurora_from_t_array), ("GALAXY", hue_galaxy_from_t_array),
+        ("TROPICAL", hue_tropical_from_t_array), ("VOLCANO", hue_volcano_from_t_array),
+        ("DEEPSEA", hue_deepsea_from_t_array), ("CYBERPUNK", hue_cyberpunk_from_t_array),
+        ("SPRING", hue_spring_from_t_array), ("SUMMER", hue_summer_from_t_array),
+        ("AUTUMN", hue_autumn_from_t_array), ("WINTER", hue_winter_from_t_array),
+        ("ICE", hue_ice_from_t_array), ("FOREST", hue_forest_from_t_array),
+        ("DESERT", hue_desert_from_t_array), ("VIRIDIS", hue_viridis_from_t_array),
+        ("INFERNO", hue_inferno_from_t_array), ("MAGMA", hue_magma_from_t_array),
+        ("PLASMA", hue_plasma_from_t_array), ("CIVIDIS", hue_cividis_from_t_array),
+        ("TWILIGHT", hue_twilight_from_t_array), ("GOLD", hue_gold_from_t_array),
+        ("SILVER", hue_silver_from_t_array), ("COPPER", hue_copper_from_t_array),
+        ("EMERALD", hue_emerald_from_t_array), ("SAPPHIRE", hue_sapphire_from_t_array),
+        ("RUBY", hue_ruby_from_t_array), ("AMETHYST", hue_amethyst_from_t_array),
+        ("BRONZE", hue_bronze_from_t_array), ("PEARL", hue_pearl_from_t_array),
+        ("CORAL", hue_coral_from_t_array), ("JADE", hue_jade_from_t_array),
+        ("TOPAZ", hue_topaz_from_t_array), ("SEPIA", hue_sepia_from_t_array)):
+    register_palette(_key, _func)
+
+# Опорные точки (t, h, s, v)
+register_palette("GRAYSCALE", points=((0.0, 0.0, 0.0, 1.0), (1/3, 0.0, 0.0, 0.8),
+                                      (2/3, 0.0, 0.0, 0.5), (1.0, 0.0, 0.0, 0.25)))
+register_palette("RED_DARKRED_GRAY_BLACK", points=((0.0, 0.0, 1.0, 1.0), (1/3, 0.0, 1.0, 0.65),
+                                                   (2/3, 0.0, 0.0, 0.25), (1.0, 0.0, 0.0, 0.0)))
+register_palette("STEEL", points=((0.0, 210.0, 0.08, 0.85), (1.0, 210.0, 0.08, 0.85)))
+register_palette("RETRO", points=((0.0, 40.0, 0.9, 1.0), (1.0, 20.0, 0.7, 0.6)))
+register_palette("VINTAGE", points=((0.0, 30.0, 0.5, 0.9), (1.0, 30.0, 0.2, 0.6)))
+register_palette("PASTEL", points=((0.0, 320.0, 0.4, 1.0), (1.0, 60.0, 0.2, 0.85)))
+register_palette("CANDY", points=((0.0, 330.0, 0.9, 1.0), (1.0, 200.0, 0.7, 0.9)))
+register_palette("LIME", points=((0.0, 75.0, 0.9, 1.0), (1.0, 75.0, 0.7, 0.8)))
+register_palette("MINT", points=((0.0, 160.0, 0.7, 1.0), (1.0, 160.0, 0.5, 0.85)))
+register_palette("PEACH", points=((0.0, 20.0, 0.8, 1.0), (1.0, 20.0, 0.5, 0.85)))
+register_palette("LAVENDER", points=((0.0, 270.0, 0.5, 1.0), (1.0, 270.0, 0.3, 0.85)))
+register_palette("ROSE", points=((0.0, 340.0, 0.8, 1.0), (1.0, 340.0, 0.5, 0.85)))
+register_palette("SKY", points=((0.0, 200.0, 0.7, 1.0), (1.0, 200.0, 0.4, 0.85)))
+register_palette("SAND", points=((0.0, 40.0, 0.6, 1.0), (1.0, 40.0, 0.3, 0.85)))
+register_palette("CHARCOAL", points=((0.0, 0.0, 0.0, 0.3), (1.0, 0.0, 0.0, 0.1)))
+register_palette("CLOUDS", points=((0.0, 210.0, 0.1, 1.0), (1.0, 210.0, 0.0, 0.9)))
+register_palette("FLAME", points=((0.0, 0.0, 1.0, 1.0), (1.0, 45.0, 0.7, 0.8)))
+
 # возраст/выцветание
 
 def max_age_slider_to_value(slider_percent: float) -> int:
@@ -2167,350 +2928,16 @@ def color_from_age_rms(age: int, rms: float, rms_strength: float,
 def color_from_age_only(age: int, fade_start: int, max_age: int,
                        sat_drop_pct: float, val_drop_pct: float,
                        global_v_mul: float, age_palette: str) -> Tuple[int,int,int]:
-    # ...existing code...
+    """Цвет клетки только по возрасту (палитра из реестра + затухание)."""
     a = min(age, max_age if max_age > 0 else age)
     t_age_raw = age_to_t(a, max_age if max_age > 0 else max(12, a+1))
     t_age = maybe_invert_t(t_age_raw)
-    # Инверсия age_palette
-    if hasattr(locals().get('layer', None), 'invert_age_palette'):
-        if getattr(locals()['layer'], 'invert_age_palette', False):
-            t_age = 1.0 - t_age
 
-    pal = palette_key(age_palette)
-
-    # --- МАТЕРИАЛЫ ---
-    if pal == "GOLD":
-        h,s,v = hue_gold_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SILVER":
-        h,s,v = hue_silver_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "COPPER":
-        h,s,v = hue_copper_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "EMERALD":
-        h,s,v = hue_emerald_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SAPPHIRE":
-        h,s,v = hue_sapphire_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "RUBY":
-        h,s,v = hue_ruby_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "AMETHYST":
-        h,s,v = hue_amethyst_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "STEEL":
-        # Можно использовать оттенок серого с небольшим синим
-        h,s,v = 210.0, 0.08, 0.85
-        h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "BRONZE":
-        h,s,v = hue_bronze_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PEARL":
-        h,s,v = hue_pearl_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CORAL":
-        h,s,v = hue_coral_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "JADE":
-        h,s,v = hue_jade_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "TOPAZ":
-        h,s,v = hue_topaz_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    # --- СПЕЦИАЛЬНЫЕ И ТЕМАТИЧЕСКИЕ ---
-    elif pal == "UKRAINE":
-        h,s,v = hue_ukraine_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "NEON":
-        h,s,v = hue_neon_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CYBERPUNK":
-        h,s,v = hue_cyberpunk_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "RETRO":
-        # Пример: желто-оранжево-коричневая гамма
-        h = lerp(40.0, 20.0, t_age)
-        s = lerp(0.9, 0.7, t_age)
-        v = lerp(1.0, 0.6, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "VINTAGE":
-        # Пример: сепия
-        h = 30.0
-        s = lerp(0.5, 0.2, t_age)
-        v = lerp(0.9, 0.6, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PASTEL":
-        # Пример: пастельные тона
-        h = lerp(320.0, 60.0, t_age)
-        s = lerp(0.4, 0.2, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CANDY":
-        # Пример: ярко-розовые и голубые
-        h = lerp(330.0, 200.0, t_age)
-        s = lerp(0.9, 0.7, t_age)
-        v = lerp(1.0, 0.9, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    # --- ПРИРОДНЫЕ ЦВЕТА ---
-    elif pal == "LIME":
-        h = 75.0
-        s = lerp(0.9, 0.7, t_age)
-        v = lerp(1.0, 0.8, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "MINT":
-        h = 160.0
-        s = lerp(0.7, 0.5, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PEACH":
-        h = 20.0
-        s = lerp(0.8, 0.5, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "LAVENDER":
-        h = 270.0
-        s = lerp(0.5, 0.3, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "ROSE":
-        h = 340.0
-        s = lerp(0.8, 0.5, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SKY":
-        h = 200.0
-        s = lerp(0.7, 0.4, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SAND":
-        h = 40.0
-        s = lerp(0.6, 0.3, t_age)
-        v = lerp(1.0, 0.85, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CHARCOAL":
-        h = 0.0
-        s = 0.0
-        v = lerp(0.3, 0.1, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CLOUDS":
-        h = 210.0
-        s = lerp(0.1, 0.0, t_age)
-        v = lerp(1.0, 0.9, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "FLAME":
-        h = lerp(0.0, 45.0, t_age)
-        s = lerp(1.0, 0.7, t_age)
-        v = lerp(1.0, 0.8, t_age) * clamp01(global_v_mul)
-        h = apply_hue_offset(h)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    # --- СЕЗОННЫЕ, НАУЧНЫЕ, МОНОХРОМНЫЕ и др. ---
-    elif pal == "SPRING":
-        h,s,v = hue_spring_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SUMMER":
-        h,s,v = hue_summer_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "AUTUMN":
-        h,s,v = hue_autumn_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "WINTER":
-        h,s,v = hue_winter_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "ICE":
-        h,s,v = hue_ice_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "FOREST":
-        h,s,v = hue_forest_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "DESERT":
-        h,s,v = hue_desert_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "VIRIDIS":
-        h,s,v = hue_viridis_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "INFERNO":
-        h,s,v = hue_inferno_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "MAGMA":
-        h,s,v = hue_magma_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PLASMA":
-        h,s,v = hue_plasma_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CIVIDIS":
-        h,s,v = hue_cividis_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "TWILIGHT":
-        h,s,v = hue_twilight_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    # --- ОСТАЛЬНЫЕ ---
-    elif pal == "RAINBOWSMOOTH":
-        h,s,v = hue_rainbow_smooth_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SUNSET":
-        h,s,v = hue_sunset_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "AURORA":
-        h,s,v = hue_aurora_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "GALAXY":
-        h,s,v = hue_galaxy_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "TROPICAL":
-        h,s,v = hue_tropical_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "VOLCANO":
-        h,s,v = hue_volcano_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "DEEPSEA":
-        h,s,v = hue_deepsea_from_t(t_age); h = apply_hue_offset(h)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "BGYR":
-        hue_deg = hue_bgyr_from_t(t_age)
-        hue_deg = apply_hue_offset(hue_deg)
-        v = clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(hue_deg, 0.85*sat_mul, v*val_mul)
-    
-    elif pal == "SEPIA":
-        hue_deg = hue_sepia_from_t(t_age); 
-        hue_deg = apply_hue_offset(hue_deg)
-        v *= clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(hue_deg, s*sat_mul, v*val_mul)
-
-    # --- МОНОХРОМНЫЕ и КОНТРАСТНЫЕ ---
-    elif pal == "GRAYSCALE":
-        if t_age < 1/3:      v_age = lerp(1.0, 0.8, t_age*3.0)
-        elif t_age < 2/3:    v_age = lerp(0.8, 0.5, (t_age-1/3)*3.0)
-        else:                v_age = lerp(0.5, 0.25, (t_age-2/3)*3.0)
-        v = v_age * clamp01(global_v_mul)
-        _, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        v *= val_mul
-        g = int(255*clamp01(v))
-        return (g, g, g)
-    elif pal == "RED_DARKRED_GRAY_BLACK":
-        if t_age < 1/3:
-            s = 1.0; v_age = lerp(1.0, 0.65, t_age*3.0); hue_deg = 0.0
-        elif t_age < 2/3:
-            k = (t_age-1/3)*3.0; s = lerp(1.0, 0.0, k); v_age = lerp(0.65, 0.25, k); hue_deg = 0.0
-        else:
-            k = (t_age-2/3)*3.0; s = 0.0; v_age = lerp(0.25, 0.0, k); hue_deg = 0.0
-        v = v_age * clamp01(global_v_mul)
-        hue_deg = apply_hue_offset(hue_deg)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(hue_deg, s*sat_mul, v*val_mul)
-
-    # --- Fallback ---
-    else:
-        # Fallback
-        return (128, 128, 128)
+    h, s, v = get_palette(palette_key(age_palette)).hsv(t_age)
+    h = apply_hue_offset(h)
+    v *= clamp01(global_v_mul)
+    sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
+    return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
 
 
 def color_from_age_brightness_rms(age: int, rms: float, rms_strength: float,
@@ -2526,207 +2953,11 @@ def color_from_age_brightness_rms(age: int, rms: float, rms_strength: float,
     t_rms = norm_rms_for_color(rms, color_rms_min, color_rms_max)
     strength = clamp01(rms_strength)
 
-    # Получаем базовый цвет из age_palette (режим "brightness")
-    pal = palette_key(age_palette)
-    
-    # Получаем базовый цвет от возраста
-    base_color = None
-
-    if pal == "GRAYSCALE":
-        if t_age < 1/3:      v_age = lerp(1.0, 0.8, t_age*3.0)
-        elif t_age < 2/3:    v_age = lerp(0.8, 0.5, (t_age-1/3)*3.0)
-        else:                v_age = lerp(0.5, 0.25, (t_age-2/3)*3.0)
-        v = v_age * (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        _, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        v *= val_mul
-        g = int(255*clamp01(v))
-        return (g, g, g)
-    elif pal == "SEPIA":
-        h,s,v = hue_sepia_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "RED_DARKRED_GRAY_BLACK":
-        if t_age < 1/3:
-            s = 1.0; v_age = lerp(1.0, 0.65, t_age*3.0); hue_deg = 0.0
-        elif t_age < 2/3:
-            k = (t_age-1/3)*3.0; s = lerp(1.0, 0.0, k); v_age = lerp(0.65, 0.25, k); hue_deg = 0.0
-        else:
-            k = (t_age-2/3)*3.0; s = 0.0; v_age = lerp(0.25, 0.0, k); hue_deg = 0.0
-        v = v_age * (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        hue_deg = apply_hue_offset(hue_deg)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(hue_deg, s*sat_mul, v*val_mul)
-
-    elif pal == "FIRE":
-        h,s,v = hue_fire_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "GOLD":
-        h,s,v = hue_gold_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SILVER":
-        h,s,v = hue_silver_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "COPPER":
-        h,s,v = hue_copper_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "EMERALD":
-        h,s,v = hue_emerald_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "SAPPHIRE":
-        h,s,v = hue_sapphire_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "RUBY":
-        h,s,v = hue_ruby_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "AMETHYST":
-        h,s,v = hue_amethyst_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "BRONZE":
-        h,s,v = hue_bronze_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PEARL":
-        h,s,v = hue_pearl_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CORAL":
-        h,s,v = hue_coral_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "JADE":
-        h,s,v = hue_jade_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "TOPAZ":
-        h,s,v = hue_topaz_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "OCEAN":
-        h,s,v = hue_ocean_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "NEON":
-        h,s,v = hue_neon_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "UKRAINE":
-        h,s,v = hue_ukraine_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "RAINBOWSMOOTH":
-        h,s,v = hue_rainbow_smooth_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "SUNSET":
-        h,s,v = hue_sunset_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "AURORA":
-        h,s,v = hue_aurora_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "GALAXY":
-        h,s,v = hue_galaxy_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "TROPICAL":
-        h,s,v = hue_tropical_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "VOLCANO":
-        h,s,v = hue_volcano_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "DEEPSEA":
-        h,s,v = hue_deepsea_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "CYBERPUNK":
-        h,s,v = hue_cyberpunk_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-
-    elif pal == "BGYR":
-        hue_deg = hue_bgyr_from_t(t_age)
-        hue_deg = apply_hue_offset(hue_deg)
-        v = (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(hue_deg, 0.85*sat_mul, v*val_mul)
-    
-    elif pal == "BRONZE":
-        h,s,v = hue_bronze_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "PEARL":
-        h,s,v = hue_pearl_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "CORAL":
-        h,s,v = hue_coral_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "JADE":
-        h,s,v = hue_jade_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    elif pal == "TOPAZ":
-        h,s,v = hue_topaz_from_t(t_age); h = apply_hue_offset(h)
-        v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
-        sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
-        return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
-    
-    else:
-        # Fallback
-        return (128, 128, 128)
+    h, s, v = get_palette(palette_key(age_palette)).hsv(t_age)
+    h = apply_hue_offset(h)
+    v *= (0.65 + 0.35 * (t_rms * strength)) * clamp01(global_v_mul)
+    sat_mul, val_mul = fade_factors(a, fade_start, max_age if max_age>0 else a+1, sat_drop_pct, val_drop_pct)
+    return _rgb_from_hsv(h, s*sat_mul, v*val_mul)
 
 
 def color_from_pitch(freq_hz: float, rms: float, rms_strength: float,
@@ -2751,110 +2982,12 @@ def color_from_rms(rms: float, palette: str,
                    global_v_mul: float) -> Tuple[int,int,int]:
     """
     Generates an RGB color from RMS value and palette.
-    For the BGYR palette, the value parameter for _rgb_from_hsv is determined by global_v_mul,
-    and the saturation is fixed at 0.85.
+    The palette is looked up in PALETTE_REGISTRY; global_v_mul scales the value.
     """
-    palette_norm = palette_key(palette)
     t = maybe_invert_t(norm_rms_for_color(rms, color_rms_min, color_rms_max))
-    # Инверсия rms_palette
-    if hasattr(locals().get('layer', None), 'invert_rms_palette'):
-        if getattr(locals()['layer'], 'invert_rms_palette', False):
-            t = 1.0 - t
-
-    if palette_norm == "BGYR":
-        h,s,v = hue_bgyr_from_t(t)
-        h = apply_hue_offset(h)
-        sat = 0.85
-        return _rgb_from_hsv(h, s*sat, v*clamp01(global_v_mul))
-
-    elif palette_norm == "SEPIA":
-        h,s,v = hue_sepia_from_t(t)
-        h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v * clamp01(global_v_mul))
-
-    elif palette_norm == "GRAYSCALE":
-        if t < 1/3: v = lerp(1.0, 0.8, t*3.0)
-        elif t < 2/3: v = lerp(0.8, 0.5, (t-1/3)*3.0)
-        else: v = lerp(0.5, 0.25, (t-2/3)*3.0)
-        v *= clamp01(global_v_mul)
-        g = int(255*clamp01(v)); return (g,g,g)
-
-    elif palette_norm == "RED_DARKRED_GRAY_BLACK":
-        if t < 1/3: s = 1.0; v = lerp(1.0, 0.65, t*3.0)
-        elif t < 2/3:
-            k = (t-1/3)*3.0; s = lerp(1.0, 0.0, k); v = lerp(0.65, 0.25, k)
-        else:
-            k = (t-2/3)*3.0; s = 0.0; v = lerp(0.25, 0.0, k)
-        hue_deg = apply_hue_offset(0.0)
-        return _rgb_from_hsv(hue_deg, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "FIRE":
-        h,s,v = hue_fire_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "OCEAN":
-        h,s,v = hue_ocean_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "NEON":
-        h,s,v = hue_neon_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "UKRAINE":
-        h,s,v = hue_ukraine_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "RAINBOWSMOOTH":
-        h,s,v = hue_rainbow_smooth_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "SUNSET":
-        h,s,v = hue_sunset_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-    elif palette_norm == "BRONZE":
-        h,s,v = hue_bronze_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-    elif palette_norm == "PEARL":
-        h,s,v = hue_pearl_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-    elif palette_norm == "CORAL":
-        h,s,v = hue_coral_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-    elif palette_norm == "JADE":
-        h,s,v = hue_jade_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-    elif palette_norm == "TOPAZ":
-        h,s,v = hue_topaz_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "AURORA":
-        h,s,v = hue_aurora_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "GALAXY":
-        h,s,v = hue_galaxy_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "TROPICAL":
-        h,s,v = hue_tropical_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "VOLCANO":
-        h,s,v = hue_volcano_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "DEEPSEA":
-        h,s,v = hue_deepsea_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    elif palette_norm == "CYBERPUNK":
-        h,s,v = hue_cyberpunk_from_t(t); h = apply_hue_offset(h)
-        return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
-
-    else:
-        hue_deg = hue_br_from_t(t)
-        hue_deg = apply_hue_offset(hue_deg)
-        return _rgb_from_hsv(hue_deg, 0.85, clamp01(global_v_mul))
+    h, s, v = get_palette(palette_key(palette)).hsv(t)
+    h = apply_hue_offset(h)
+    return _rgb_from_hsv(h, s, v*clamp01(global_v_mul))
 
 # -------------------- GUI (Notebook с доп. вкладками) --------------------
 
@@ -3042,61 +3175,1154 @@ def start_audio_stream(device_name):
 
 # -------------------- Правила автомата --------------------
 
-def step_life(grid: np.ndarray, rule: str) -> np.ndarray:
+# Именованные правила в нотации Golly B/S
+CA_RULE_STRINGS = {
+    "Conway": "B3/S23",
+    "HighLife": "B36/S23",
+    "Day&Night": "B3678/S345678",
+    "Replicator": "B1357/S1357",
+    "Seeds": "B2/S",
+    "Maze": "B3/S12345",
+    "Coral": "B3/S45678",
+    "LifeWithoutDeath": "B3/S012345678",
+    "Gnarl": "B1/S1",
+    # Generations: C состояний, 2..C-1 — угасающие клетки
+    "Brian's Brain": "B2/S/C3",
+    "Star Wars": "B2/S345/C4",
+    # Larger-than-Life: радиус R, окрестность N (M — квадрат, N — ромб, C — круг)
+    "Bosco's Rule": "R5,C0,M1,S34..58,B34..45,NM",
+    "Majority": "R4,C0,M1,S41..81,B41..81,NM",
+    "Waffle": "R7,C0,M1,S100..200,B75..170,NM",
+    "Bugsmovie": "R10,C0,M1,S123..212,B123..170,NM",
+}
+
+@lru_cache(maxsize=64)
+def rule_table(rule: str) -> Optional[np.ndarray]:
+    """
+    Таблица переходов (2, 9) для правила: [состояние, число соседей] -> жива ли клетка.
+
+    Принимает имя из CA_RULE_STRINGS, строку "B3/S23" (регистр и порядок B/S
+    не важны) или классическую запись "S/B" вида "23/3".
+    Возвращает None, если правило не распознано.
+    """
+    spec = CA_RULE_STRINGS.get(rule, rule)
+    text = (spec or "").replace(" ", "").upper()
+    parts = text.split("/")
+    if len(parts) != 2:
+        return None
+    if parts[0].startswith(("B", "S")) and parts[1].startswith(("B", "S")):
+        fields = {p[0]: p[1:] for p in parts}
+        if set(fields) != {"B", "S"}:
+            return None
+        born, survive = fields["B"], fields["S"]
+    else:
+        survive, born = parts
+    digits = set("012345678")
+    if not (set(born) <= digits and set(survive) <= digits):
+        return None
+    table = np.zeros((2, 9), dtype=bool)
+    table[0, [int(c) for c in born]] = True
+    table[1, [int(c) for c in survive]] = True
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=64)
+def generations_table(rule: str) -> Optional[np.ndarray]:
+    """
+    Таблица переходов (C, 9) uint8 для правил Generations: [состояние, живые соседи] -> состояние.
+
+    0 — пусто, 1 — живая клетка, 2..C-1 — угасающие, каждый шаг +1, после C-1 — 0.
+    Принимает "B2/S/C3" (буква G вместо C тоже), запись Golly "S/B/C" вида "345/2/4"
+    и любые двухсостоянийные правила rule_table (тогда C = 2).
+    """
+    spec = CA_RULE_STRINGS.get(rule, rule)
+    parts = (spec or "").replace(" ", "").upper().split("/")
+    if len(parts) == 2:
+        binary = rule_table(rule)
+        return None if binary is None else binary.astype(np.uint8)
+    if len(parts) != 3:
+        return None
+    if all(p[:1] in ("B", "S", "C", "G") for p in parts):
+        fields = {("C" if p[0] == "G" else p[0]): p[1:] for p in parts}
+        if set(fields) != {"B", "S", "C"}:
+            return None
+        born, survive, count = fields["B"], fields["S"], fields["C"]
+    else:
+        survive, born, count = parts
+    digits = set("012345678")
+    if not (set(born) <= digits and set(survive) <= digits and count.isdigit()):
+        return None
+    states = int(count)
+    if not 2 <= states <= 256:
+        return None
+    table = np.zeros((states, 9), dtype=np.uint8)
+    table[0, [int(c) for c in born]] = 1
+    table[1, :] = 2 % states
+    table[1, [int(c) for c in survive]] = 1
+    for k in range(2, states):
+        table[k, :] = (k + 1) % states
+    table.flags.writeable = False
+    return table
+
+def rule_states(rule: str) -> int:
+    """Число состояний правила: 2 для обычных B/S, C для Generations и Larger-than-Life"""
+    table = generations_table(rule)
+    if table is None:
+        ltl = ltl_rule(rule)
+        return 2 if ltl is None else ltl.states
+    return table.shape[0]
+
+def rule_uses_states(rule: str) -> bool:
+    """Шаг идёт по uint8-состояниям: Generations (C > 2) и любые Larger-than-Life"""
+    return rule_states(rule) > 2 or ltl_rule(rule) is not None
+
+@lru_cache(maxsize=64)
+def generations_age_lut(states: int, max_age: int) -> np.ndarray:
+    """Возраст для окраски угасающих состояний: 2..C-1 равномерно к старому концу палитры"""
+    lut = (np.arange(states, dtype=np.int64) * max(max_age, 1)) // max(states, 1)
+    lut[:2] = 0
+    lut = lut.astype(np.int32)
+    lut.flags.writeable = False
+    return lut
+
+def sync_generations_state(state: np.ndarray, grid: np.ndarray) -> None:
+    """Живые клетки задаёт grid: спавн и отбраковка вне шага переносятся в состояния"""
+    state[grid] = 1
+    state[(state == 1) & ~grid] = 0
+
+def step_generations(state: np.ndarray, rule: str, topology: str = "bounded") -> np.ndarray:
+    """Шаг Generations: одна выборка из таблицы по (состояние, число живых соседей)"""
+    table = generations_table(rule)
+    if table is None:
+        return state.copy()
+    H, W = state.shape
+    padded = np.zeros((H + 2, W + 2), dtype=np.uint8)
+    padded[1:H+1, 1:W+1] = state == 1
+    if topology == "torus":
+        _wrap_ghosts(padded)
+    neighbors = (
+        padded[0:H,0:W] + padded[0:H,1:W+1] + padded[0:H,2:W+2] +
+        padded[1:H+1,0:W] +                     padded[1:H+1,2:W+2] +
+        padded[2:H+2,0:W] + padded[2:H+2,1:W+1] + padded[2:H+2,2:W+2]
+    )
+    return np.take(table.ravel(), state.astype(np.intp) * 9 + neighbors)
+
+@dataclass(frozen=True)
+class LtLRule:
+    """Правило Larger-than-Life: радиус, окрестность и таблица [состояние, число соседей]"""
+    radius: int
+    states: int
+    include_centre: bool
+    neighbourhood: str  # "M" — квадрат (Мур), "N" — ромб (фон Нейман), "C" — круг
+    table: np.ndarray
+
+@lru_cache(maxsize=64)
+def ltl_rule(rule: str) -> Optional[LtLRule]:
+    """
+    Разбирает правило Larger-than-Life в записи Golly: "R5,C0,M1,S34..58,B34..45,NM".
+    C0/C2 — два состояния, C>2 — угасание как у Generations; M1 — центр входит в сумму.
+    Возвращает None для прочих правил.
+    """
+    spec = CA_RULE_STRINGS.get(rule, rule)
+    fields = {}
+    for part in (spec or "").replace(" ", "").upper().split(","):
+        if len(part) < 2 or part[0] in fields:
+            return None
+        fields[part[0]] = part[1:]
+    if set(fields) != {"R", "C", "M", "S", "B", "N"}:
+        return None
+    try:
+        radius, states, centre = int(fields["R"]), int(fields["C"]), int(fields["M"])
+        s_min, s_max = (int(v) for v in fields["S"].split(".."))
+        b_min, b_max = (int(v) for v in fields["B"].split(".."))
+    except ValueError:
+        return None
+    if not (1 <= radius <= 50 and 0 <= states <= 256 and centre in (0, 1) and fields["N"] in ("M", "N", "C")):
+        return None
+    states = max(states, 2)
+    counts = (2 * radius + 1) ** 2 + 1
+    table = np.zeros((states, counts), dtype=np.uint8)
+    table[0, max(b_min, 0):b_max + 1] = 1
+    table[1, :] = 2 % states
+    table[1, max(s_min, 0):s_max + 1] = 1
+    for k in range(2, states):
+        table[k, :] = (k + 1) % states
+    table.flags.writeable = False
+    return LtLRule(radius, states, bool(centre), fields["N"], table)
+
+def _diamond_view(rotated: np.ndarray, H: int, W: int) -> np.ndarray:
+    """
+    Вид (H, W) на повёрнутый на 45° массив: клетка (y, x) -> (y + x, y - x + W - 1).
+    Ромб |dy| + |dx| <= R становится квадратом; копии идут по шагам, без индексов.
+    """
+    rs, cs = rotated.strides
+    return np.lib.stride_tricks.as_strided(rotated[:, W - 1:], shape=(H, W), strides=(rs + cs, rs - cs))
+
+def _box_sums(cells: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Суммы квадратов (2R+1)×(2R+1) вокруг каждой клетки по таблице сумм (summed-area table).
+    Таблица в uint16 по модулю 2^16: разности точны, пока сумма квадрата < 65536 (R <= 50).
+    """
+    H, W = cells.shape
+    d = 2 * radius + 1
+    sat = np.zeros((H + d, W + d), dtype=np.uint16)
+    np.cumsum(np.pad(cells, radius).cumsum(axis=0, dtype=np.uint16), axis=1, out=sat[1:, 1:])
+    return sat[d:, d:] - sat[:-d, d:] - sat[d:, :-d] + sat[:-d, :-d]
+
+def ltl_counts(alive: np.ndarray, ltl: LtLRule, topology: str = "bounded") -> np.ndarray:
+    """
+    Число живых клеток в окрестности радиуса R, uint16 (H, W).
+    Квадрат и ромб — через таблицы сумм за O(H·W) при любом R;
+    круг — по префиксным суммам строк, O(H·W·R).
+    Для тора поле один раз дополняется склеенными краями шириной R.
+    """
+    R = ltl.radius
+    if topology == "torus":
+        return ltl_counts(np.pad(alive, R, mode="wrap"), ltl)[R:-R, R:-R]
+    H, W = alive.shape
+    cells = alive.astype(np.uint16)
+    if ltl.neighbourhood == "M":
+        counts = _box_sums(cells, R)
+    elif ltl.neighbourhood == "N":
+        # |dy| + |dx| <= R  <=>  |du| <= R и |dv| <= R в повёрнутых координатах
+        rotated = np.zeros((H + W - 1, H + W - 1), dtype=np.uint16)
+        _diamond_view(rotated, H, W)[...] = cells
+        counts = _diamond_view(_box_sums(rotated, R), H, W).copy()
+    else:
+        # Круг как в Golly: dy² + dx² <= R² + R, отрезок строки на каждый dy
+        rows = np.zeros((H + 2 * R, W + 2 * R + 1), dtype=np.uint16)
+        np.cumsum(np.pad(cells, R), axis=1, out=rows[:, 1:])
+        counts = np.zeros((H, W), dtype=np.uint16)
+        for dy in range(-R, R + 1):
+            w = math.isqrt(R * R + R - dy * dy)
+            band = rows[R + dy:R + dy + H]
+            counts += band[:, R + w + 1:R + w + 1 + W] - band[:, R - w:R - w + W]
+    if not ltl.include_centre:
+        counts -= cells
+    return counts
+
+def step_ltl(state: np.ndarray, rule: str, topology: str = "bounded") -> np.ndarray:
+    """Шаг Larger-than-Life по uint8-состояниям: таблица [состояние, число соседей]"""
+    ltl = ltl_rule(rule)
+    if ltl is None:
+        return state.copy()
+    counts = ltl_counts(state == 1, ltl, topology)
+    return np.take(ltl.table.ravel(), state.astype(np.intp) * ltl.table.shape[1] + counts)
+
+def _wrap_ghosts(padded: np.ndarray) -> None:
+    """Рамка (..., H+2, W+2) из противоположных краёв поля: тор без копии сетки"""
+    padded[..., 0, 1:-1] = padded[..., -2, 1:-1]
+    padded[..., -1, 1:-1] = padded[..., 1, 1:-1]
+    padded[..., :, 0] = padded[..., :, -2]
+    padded[..., :, -1] = padded[..., :, 1]
+
+def _clear_ghosts(padded: np.ndarray) -> None:
+    """Нулевая рамка (..., H+2, W+2): за краем поля мёртвые клетки"""
+    padded[..., 0, :] = 0
+    padded[..., -1, :] = 0
+    padded[..., :, 0] = 0
+    padded[..., :, -1] = 0
+
+def step_life(grid: np.ndarray, rule: str, engine: str = "dense", topology: str = "bounded") -> np.ndarray:
+    if engine == "bitboard" and topology != "torus":
+        return step_life_bitboard(grid, rule)
     H, W = grid.shape
-    
-    input_count = np.sum(grid)
-    
-    # ИСПРАВЛЕНИЕ: принудительно конвертируем в int, чтобы арифметика работала
-    padded = np.pad(grid.astype(int), ((1,1),(1,1)), mode='constant', constant_values=0)
+    table = rule_table(rule)
+    if table is None:
+        return grid.copy()
+
+    padded = np.zeros((H + 2, W + 2), dtype=np.uint8)
+    padded[1:H+1, 1:W+1] = grid
+    if topology == "torus":
+        _wrap_ghosts(padded)
     neighbors = (
         padded[0:H,0:W] + padded[0:H,1:W+1] + padded[0:H,2:W+2] +
         padded[1:H+1,0:W] +                     padded[1:H+1,2:W+2] +
         padded[2:H+2,0:W] + padded[2:H+2,1:W+1] + padded[2:H+2,2:W+2]
     )
-    new = np.zeros_like(grid, dtype=bool)
+    # Индекс в таблице: состояние*9 + соседи, одна выборка на клетку
+    neighbors += padded[1:H+1,1:W+1] * np.uint8(9)
+    return np.take(table.ravel(), neighbors)
 
-    if rule == "Conway":
-        survive_mask = grid & ((neighbors==2)|(neighbors==3))
-        birth_mask = (~grid) & (neighbors==3)
-        new[survive_mask | birth_mask] = True
-            
-    elif rule == "HighLife":
-        survive_mask = grid & ((neighbors==2)|(neighbors==3))
-        birth_mask = (~grid) & ((neighbors==3)|(neighbors==6))
-        new[survive_mask | birth_mask] = True
-            
-    elif rule == "Day&Night":
-        survive_mask = grid & (((neighbors>=3)&(neighbors<=6)) | (neighbors==7) | (neighbors==8))
-        birth_mask = (~grid) & ((neighbors==3)|(neighbors==6)|(neighbors==7)|(neighbors==8))
-        new[survive_mask | birth_mask] = True
-            
-    elif rule == "Replicator":
-        new[(neighbors % 2) == 1] = True
-    elif rule == "Seeds":
-        new[(~grid & (neighbors==2))] = True
-    elif rule == "Maze":  # B3/S12345
-        born = (~grid) & (neighbors==3)
-        survive = grid & ((neighbors>=1)&(neighbors<=5))
-        new[born | survive] = True
-    elif rule == "Coral":  # B3/S45678
-        born = (~grid) & (neighbors==3)
-        survive = grid & ((neighbors>=4)&(neighbors<=8))
-        new[born | survive] = True
-    elif rule == "LifeWithoutDeath":  # B3/S012345678
-        born = (~grid) & (neighbors==3)
-        survive = grid
-        new[born | survive] = True
-                    
-    elif rule == "Gnarl":  # B1/S1
-        born = (~grid) & (neighbors==1)
-        survive = grid & (neighbors==1)
-        new[born | survive] = True
+@lru_cache(maxsize=64)
+def rule_masks(rules: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Битовые маски правил для шага без таблицы индексов: бит n маски —
+    жива ли клетка при n соседях. Возвращает (born, survive - born) формы
+    (L, 1, 1) int16. Нераспознанное правило — тождественное (B/S012345678).
+    """
+    born = np.zeros((len(rules), 1, 1), dtype=np.int16)
+    diff = np.zeros((len(rules), 1, 1), dtype=np.int16)
+    for l, rule in enumerate(rules):
+        table = rule_table(rule)
+        if table is None:
+            b, s_ = 0, 0x1FF
+        else:
+            weights = 1 << np.arange(9)
+            b = int(weights[table[0]].sum())
+            s_ = int(weights[table[1]].sum())
+        born[l] = b
+        diff[l] = s_ - b
+    born.flags.writeable = False
+    diff.flags.writeable = False
+    return born, diff
+
+def _apply_rule_masks(center: np.ndarray, neighbors: np.ndarray, born: np.ndarray,
+                      diff: np.ndarray, work: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    out = бит neighbors маски правила: маска = born для мёртвых и survive для живых.
+    Все операции пишут в work (int16) и out, без временных массивов.
+    """
+    np.multiply(center, diff, out=work)
+    np.add(work, born, out=work)
+    np.right_shift(work, neighbors, out=work)
+    np.bitwise_and(work, 1, out=work)
+    np.copyto(out, work, casting='unsafe')
+    return out
+
+class LifeStepper:
+    """
+    Шаг автомата без выделения памяти на тик.
+
+    Держит постоянные буферы слоя: uint8-сетку с рамкой, аккумулятор соседей,
+    рабочий int16-буфер и два выходных буфера, которые чередуются между
+    шагами. Возвращаемая сетка — один из выходных буферов; через шаг он
+    будет перезаписан. Для тора рамка заполняется противоположными краями.
+    """
+
+    def __init__(self):
+        self.shape: Optional[Tuple[int, int]] = None
+        self._front = 0
+        self._torus = False  # рамка буфера сейчас заполнена краями тора
+
+    def _ensure_buffers(self, shape: Tuple[int, int]):
+        if self.shape == shape:
+            return
+        H, W = shape
+        self._padded = np.zeros((H + 2, W + 2), dtype=np.uint8)
+        self._center = self._padded[1:H+1, 1:W+1]
+        self._views = [self._padded[dy:dy+H, dx:dx+W]
+                       for dy in range(3) for dx in range(3) if (dy, dx) != (1, 1)]
+        self._acc = np.empty((H, W), dtype=np.uint8)
+        self._work = np.empty((H, W), dtype=np.int16)
+        self._out = (np.zeros((H, W), dtype=bool), np.zeros((H, W), dtype=bool))
+        self._front = 0
+        self._states = None
+        self._torus = False
+        self.shape = shape
+
+    def _update_ghosts(self, torus: bool):
+        """Рамка после копирования сетки: края тора или нули"""
+        if torus:
+            _wrap_ghosts(self._padded)
+        elif self._torus:
+            _clear_ghosts(self._padded)
+        self._torus = torus
+
+    def step(self, grid: np.ndarray, rule: str, engine: str = "dense", topology: str = "bounded") -> np.ndarray:
+        torus = topology == "torus"
+        # Битовый движок знает только ограниченное поле
+        if engine == "bitboard" and not torus:
+            return step_life_bitboard(grid, rule)
+        if rule_table(rule) is None:
+            return grid.copy()
+        self._ensure_buffers(grid.shape)
+        born, diff = rule_masks((rule,))
+
+        np.copyto(self._center, grid)
+        self._update_ghosts(torus)
+        acc = self._acc
+        views = self._views
+        np.add(views[0], views[1], out=acc)
+        for view in views[2:]:
+            np.add(acc, view, out=acc)
+
+        out = self._out[self._front]
+        if np.may_share_memory(out, grid):
+            self._front ^= 1
+            out = self._out[self._front]
+        _apply_rule_masks(self._center, acc, born[0], diff[0], self._work, out)
+        self._front ^= 1
+        return out
+
+    def step_generations(self, state: np.ndarray, rule: str, topology: str = "bounded") -> np.ndarray:
+        """Шаг Generations по uint8-состояниям; результат чередуется между двумя буферами"""
+        if ltl_rule(rule) is not None:
+            return step_ltl(state, rule, topology)
+        table = generations_table(rule)
+        if table is None:
+            return state.copy()
+        self._ensure_buffers(state.shape)
+        if getattr(self, '_states', None) is None or self._states[0].shape != state.shape:
+            self._index = np.empty(state.shape, dtype=np.intp)
+            self._states = (np.zeros(state.shape, dtype=np.uint8), np.zeros(state.shape, dtype=np.uint8))
+            self._states_front = 0
+
+        np.equal(state, 1, out=self._center.view(bool))
+        self._update_ghosts(topology == "torus")
+        acc = self._acc
+        views = self._views
+        np.add(views[0], views[1], out=acc)
+        for view in views[2:]:
+            np.add(acc, view, out=acc)
+
+        # Индекс в таблице: состояние*9 + живые соседи
+        index = self._index
+        np.multiply(state, np.intp(9), out=index)
+        np.add(index, acc, out=index)
+        out = self._states[self._states_front]
+        if np.may_share_memory(out, state):
+            self._states_front ^= 1
+            out = self._states[self._states_front]
+        np.take(table.ravel(), index, out=out)
+        self._states_front ^= 1
+        return out
+
+    def fast_forward(self, grid: np.ndarray, rule: str, generations: int, topology: str = "bounded",
+                     deadline: Optional[float] = None) -> np.ndarray:
+        """
+        generations шагов подряд с краями как на тике (App.update_layers): на
+        ограниченном поле край гасится после каждого шага. HashLife здесь не
+        подходит — он считает бесконечное поле, куда уходят и откуда возвращаются клетки.
+        Только для правил B/S — Generations и Larger-than-Life см. fast_forward_states.
+        deadline — момент time.monotonic(), после которого бросается TimeoutError.
+        """
+        if rule_table(rule) is None:
+            raise ValueError(f"rule {rule!r} has no B/S table")
+        bounded = topology != "torus"
+        for n in range(max(1, generations)):
+            grid = self.step(grid, rule, "dense", topology)
+            if bounded:
+                grid[[0, -1], :] = False
+                grid[:, [0, -1]] = False
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"time budget exceeded after {n + 1} of {generations} generations")
+        return grid.copy()
+
+    def fast_forward_states(self, state: np.ndarray, rule: str, generations: int,
+                            topology: str = "bounded", deadline: Optional[float] = None) -> np.ndarray:
+        """
+        generations шагов Generations / Larger-than-Life по uint8-состояниям.
+        На ограниченном поле живые клетки края гаснут, как после чистки краёв на тике.
+        """
+        if not rule_uses_states(rule):
+            raise ValueError(f"rule {rule!r} has no states")
+        bounded = topology != "torus"
+        for n in range(max(1, generations)):
+            state = self.step_generations(state, rule, topology)
+            if bounded:
+                for edge in (state[0], state[-1], state[:, 0], state[:, -1]):
+                    edge[edge == 1] = 0
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"time budget exceeded after {n + 1} of {generations} generations")
+        return state.copy()
+
+    def step_regions(self, grid: np.ndarray, rule: str, regions: List[Tuple[slice, slice]]) -> np.ndarray:
+        """
+        Шаг только внутри прямоугольников regions (см. ActiveTiles).
+        Вне них результат — мёртвые клетки, поэтому regions должны покрывать
+        всех живых клеток и их соседей. Только для ограниченного поля.
+        """
+        if rule_table(rule) is None:
+            return grid.copy()
+        self._ensure_buffers(grid.shape)
+        self._update_ghosts(False)
+        born, diff = rule_masks((rule,))
+        H, W = grid.shape
+
+        out = self._out[self._front]
+        if np.may_share_memory(out, grid):
+            self._front ^= 1
+            out = self._out[self._front]
+        out.fill(False)
+
+        padded = self._padded
+        for rs, cs in regions:
+            r0, r1, c0, c1 = rs.start, rs.stop, cs.start, cs.stop
+            # Копируем регион с рамкой в одну клетку: вне регионов буфер хранит старые клетки
+            gr0, gr1, gc0, gc1 = max(r0 - 1, 0), min(r1 + 1, H), max(c0 - 1, 0), min(c1 + 1, W)
+            np.copyto(padded[gr0+1:gr1+1, gc0+1:gc1+1], grid[gr0:gr1, gc0:gc1])
+
+            acc = self._acc[rs, cs]
+            views = [padded[r0+dy:r1+dy, c0+dx:c1+dx]
+                     for dy in range(3) for dx in range(3) if (dy, dx) != (1, 1)]
+            np.add(views[0], views[1], out=acc)
+            for view in views[2:]:
+                np.add(acc, view, out=acc)
+            _apply_rule_masks(padded[r0+1:r1+1, c0+1:c1+1], acc, born[0], diff[0],
+                              self._work[rs, cs], out[rs, cs])
+        self._front ^= 1
+        return out
+
+
+class BatchLifeStepper:
+    """
+    Шаг всех слоёв одним проходом по стеку (L, H, W).
+
+    Соседи считаются для всего стека сразу, правило слоя берётся из масок
+    формы (L, 1, 1), которые транслируются по его плоскости. Буферы
+    постоянные, выходные стеки чередуются между шагами, как в LifeStepper.
+    Слои с собственными часами дают стеки разной высоты — буферы
+    каждой формы хранятся отдельно.
+    """
+
+    _STATE = ('_padded', '_center', '_views', '_acc', '_work', '_out',
+              '_layer_views', '_front', '_torus')
+
+    def __init__(self):
+        self.shape: Optional[Tuple[int, int, int]] = None
+        self._front = 0
+        self._cache: Dict[Tuple[int, int, int], tuple] = {}
+
+    def owns(self, grid: np.ndarray) -> bool:
+        """True, если сетка — срез одного из выходных стеков (её перезапишет следующий шаг)"""
+        base = getattr(grid, 'base', None)
+        if base is None:
+            return False
+        outs = [state[5] for state in self._cache.values()]
+        if self.shape is not None:
+            outs.append(self._out)
+        return any(base is buf for out in outs for buf in out)
+
+    def _ensure_buffers(self, shape: Tuple[int, int, int]):
+        if self.shape == shape:
+            return
+        if self.shape is not None:
+            self._cache[self.shape] = tuple(getattr(self, name) for name in self._STATE)
+        cached = self._cache.pop(shape, None)
+        if cached is not None:
+            for name, value in zip(self._STATE, cached):
+                setattr(self, name, value)
+            self.shape = shape
+            return
+        L, H, W = shape
+        self._padded = np.zeros((L, H + 2, W + 2), dtype=np.uint8)
+        self._center = self._padded[:, 1:H+1, 1:W+1]
+        self._views = [self._padded[:, dy:dy+H, dx:dx+W]
+                       for dy in range(3) for dx in range(3) if (dy, dx) != (1, 1)]
+        self._acc = np.empty(shape, dtype=np.uint8)
+        self._work = np.empty(shape, dtype=np.int16)
+        self._out = (np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool))
+        self._layer_views = tuple([buf[l] for l in range(L)] for buf in self._out)
+        self._front = 0
+        self._torus = [False] * L
+        self.shape = shape
+
+    def step(self, grids: List[np.ndarray], rules: List[str],
+             topologies: Optional[List[str]] = None) -> List[np.ndarray]:
+        """Возвращает новые сетки слоёв — срезы выходного стека (L, H, W)"""
+        L = len(grids)
+        H, W = grids[0].shape
+        self._ensure_buffers((L, H, W))
+        born, diff = rule_masks(tuple(rules))
+
+        # Обычный случай: сетки слоёв — это прошлый выходной стек, копируем одним вызовом
+        prev = self._layer_views[self._front ^ 1]
+        if all(g is p for g, p in zip(grids, prev)):
+            np.copyto(self._center, self._out[self._front ^ 1])
+        else:
+            for l, g in enumerate(grids):
+                np.copyto(self._center[l], g)
+
+        # Рамка каждой плоскости: края тора или нули
+        torus = [t == "torus" for t in topologies] if topologies else [False] * L
+        for l, t in enumerate(torus):
+            if t:
+                _wrap_ghosts(self._padded[l])
+            elif self._torus[l]:
+                _clear_ghosts(self._padded[l])
+        self._torus = torus
+
+        acc = self._acc
+        views = self._views
+        np.add(views[0], views[1], out=acc)
+        for view in views[2:]:
+            np.add(acc, view, out=acc)
+
+        _apply_rule_masks(self._center, acc, born, diff, self._work, self._out[self._front])
+        result = self._layer_views[self._front]
+        self._front ^= 1
+        return result
+
+# -------------------- Активные области --------------------
+
+TILE_SIZE = 16            # Сторона плитки карты активности, клеток
+TILE_REGION_COST = 32768  # Накладные расходы на один регион (~30 мкс), в клетках полного прохода
+TILE_MAX_FRACTION = 0.5   # Выше этой доли поля регионы не выгоднее полного прохода
+
+class ActiveTiles:
+    """
+    Карта активных плиток TILE_SIZE×TILE_SIZE для слоя.
+
+    Раз в тик по сетке строится карта занятых плиток. Из неё получаются
+    регионы — прямоугольники из соседних плиток в клетках поля:
+      step_regions — занятые плитки и их соседи: только там может появиться
+                     жизнь на следующем шаге (для правил без B0);
+      age_regions  — занятые сейчас и на прошлом тике: вне них возраст нулевой;
+      live_regions — где лежат живые клетки после шага (с учётом зеркал).
+    Регион равен None, если проще обработать поле целиком.
+    """
+
+    def __init__(self, tile: int = TILE_SIZE):
+        self.tile = tile
+        self.shape: Optional[Tuple[int, int]] = None
+        self.occupied: Optional[np.ndarray] = None
+        self.step_regions: Optional[List[Tuple[slice, slice]]] = None
+        self.age_regions: Optional[List[Tuple[slice, slice]]] = None
+        self.live_regions: Optional[List[Tuple[slice, slice]]] = None
+        self._aged: Optional[np.ndarray] = None
+
+    def _ensure_buffers(self, shape: Tuple[int, int]):
+        if self.shape == shape:
+            return
+        H, W = shape
+        T = self.tile
+        th, tw = -(-H // T), -(-W // T)
+        self._band_rows = np.zeros((th, W), dtype=np.uint8)
+        self._col_starts = np.arange(0, W, T)
+        # Прошлый тик неизвестен: считаем возраст ненулевым везде
+        self._aged = np.ones((th, tw), dtype=bool)
+        self.shape = shape
+
+    def invalidate(self):
+        """Сетка изменена вне тика: до следующего update регионы неизвестны"""
+        self.step_regions = self.age_regions = self.live_regions = None
+        self._aged = None
+        self.shape = None
+
+    def occupancy(self, grid: np.ndarray) -> np.ndarray:
+        """(th, tw) bool: есть ли в плитке живые клетки"""
+        self._ensure_buffers(grid.shape)
+        H, W = grid.shape
+        T = self.tile
+        full = H // T
+        cells = grid.view(np.uint8)
+        bands = self._band_rows
+        if full:
+            np.bitwise_or.reduce(cells[:full * T].reshape(full, T, W), axis=1, out=bands[:full])
+        if full * T < H:
+            np.bitwise_or.reduce(cells[full * T:], axis=0, out=bands[full])
+        return np.bitwise_or.reduceat(bands, self._col_starts, axis=1).astype(bool)
+
+    def update(self, grid: np.ndarray, rule: str, engine: str = "dense", topology: str = "bounded"):
+        """Пересчитывает регионы по сетке в начале тика"""
+        H, W = grid.shape
+        if H * W * TILE_MAX_FRACTION <= TILE_REGION_COST:
+            # Поле меньше одного региона: отличаем только пустую сетку
+            self.step_regions = self.live_regions = None if grid.any() else []
+            self.age_regions = None
+            return
+        occupied = self.occupancy(grid)
+        table = generations_table(rule)
+        ltl = ltl_rule(rule)
+        if ltl is not None:
+            table = ltl.table
+        if (table is not None and table[0, 0]) or (ltl is not None and ltl.radius > self.tile):
+            # B0 или окрестность шире плитки: активно всё поле
+            near = np.ones_like(occupied)
+        elif topology == "torus":
+            # Соседи плиток через склеенные края
+            near = occupied | np.roll(occupied, 1, axis=0) | np.roll(occupied, -1, axis=0)
+            near = near | np.roll(near, 1, axis=1) | np.roll(near, -1, axis=1)
+        else:
+            near = occupied.copy()
+            near[1:] |= occupied[:-1]
+            near[:-1] |= occupied[1:]
+            rows = near.copy()
+            near[:, 1:] |= rows[:, :-1]
+            near[:, :-1] |= rows[:, 1:]
+        self.step_regions = self.regions(near)
+        self.age_regions = self.regions(occupied | self._aged)
+        self.live_regions = self.step_regions
+        self.occupied = occupied
+        self._aged = occupied
+
+    def mirror(self, flip_x: bool, flip_y: bool):
+        """Отражает live_regions вслед за зеркалированием сетки"""
+        if not self.live_regions or not (flip_x or flip_y):
+            return
+        H, W = self.shape
+        mirrored = []
+        for rs, cs in self.live_regions:
+            if flip_y:
+                rs = slice(H - rs.stop, H - rs.start)
+            if flip_x:
+                cs = slice(W - cs.stop, W - cs.start)
+            mirrored.append((rs, cs))
+        self.live_regions = mirrored
+
+    def regions(self, mask: np.ndarray) -> Optional[List[Tuple[slice, slice]]]:
+        """
+        Прямоугольники из активных плиток: отрезки подряд идущих плиток в строке,
+        одинаковые отрезки соседних строк склеиваются. None — если регионов
+        столько, что полный проход дешевле.
+        """
+        H, W = self.shape
+        budget = TILE_MAX_FRACTION * H * W
+        edges = np.diff(mask.astype(np.int8), axis=1, prepend=0, append=0)
+        run_rows, run_starts = np.nonzero(edges == 1)
+        if len(run_rows) * TILE_REGION_COST > budget:
+            return None
+        run_stops = np.nonzero(edges == -1)[1]
+
+        T = self.tile
+        done: List[List[int]] = []
+        open_runs: Dict[Tuple[int, int], List[int]] = {}
+        for r, c0, c1 in zip(run_rows.tolist(), run_starts.tolist(), run_stops.tolist()):
+            run = open_runs.get((c0, c1))
+            if run is not None and run[1] == r - 1:
+                run[1] = r
+            else:
+                if run is not None:
+                    done.append(run)
+                open_runs[(c0, c1)] = [r, r, c0, c1]
+        done.extend(open_runs.values())
+
+        regions = [(slice(r0 * T, min((r1 + 1) * T, H)), slice(c0 * T, min(c1 * T, W)))
+                   for r0, r1, c0, c1 in done]
+        area = sum((rs.stop - rs.start) * (cs.stop - cs.start) for rs, cs in regions)
+        if area + len(regions) * TILE_REGION_COST > budget:
+            return None
+        return regions
+
+
+FULL_GRID_REGIONS = [(slice(None), slice(None))]
+
+def regions_or_full(regions: Optional[List[Tuple[slice, slice]]]) -> List[Tuple[slice, slice]]:
+    """Регионы ActiveTiles или всё поле одним регионом, если регионов нет"""
+    return FULL_GRID_REGIONS if regions is None else regions
+
+def count_alive(grid: np.ndarray, regions: Optional[List[Tuple[slice, slice]]] = None) -> int:
+    return sum(int(np.count_nonzero(grid[region])) for region in regions_or_full(regions))
+
+def count_births_deaths(old: np.ndarray, new: np.ndarray,
+                        regions: Optional[List[Tuple[slice, slice]]] = None) -> Tuple[int, int]:
+    """Рождения и смерти шага old -> new; вне regions клетки мертвы в обеих сетках"""
+    births = deaths = 0
+    for region in regions_or_full(regions):
+        o, n = old[region], new[region]
+        births += int(np.count_nonzero(n > o))
+        deaths += int(np.count_nonzero(o > n))
+    return births, deaths
+
+def layer_population(layer) -> int:
+    """Число живых клеток слоя из кэша статистики; пересчёт только если кэш сброшен"""
+    stats = getattr(layer, 'stats', None)
+    if stats is None:
+        stats = layer.stats = LayerStats()
+    if stats.population < 0:
+        stats.population = int(np.count_nonzero(layer.grid))
+    return stats.population
+
+def touch_layer(layer):
+    """Отмечает изменение сетки слоя: кэши рендера сверяются с layer.generation"""
+    layer.generation = getattr(layer, 'generation', 0) + 1
+
+def alive_positions(grid: np.ndarray, regions: Optional[List[Tuple[slice, slice]]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Как np.where(grid), но только внутри регионов"""
+    if regions is None:
+        return np.where(grid)
+    rows, cols = [], []
+    for rs, cs in regions:
+        r, c = np.nonzero(grid[rs, cs])
+        rows.append(r + rs.start)
+        cols.append(c + cs.start)
+    if not rows:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    return np.concatenate(rows), np.concatenate(cols)
+
+def cull_indices(n: int, k: int, head: int = 0,
+                 ages: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Выбор k из n живых клеток на удаление за O(n): (первые head, остальные).
+
+    С ages — самые старые (argpartition, первые head старше остальных),
+    без — случайные по маске Бернулли с p = k/n, поэтому число выбранных
+    равно k лишь в среднем.
+    """
+    k = min(k, n)
+    head = min(head, k)
+    if k <= 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+    if ages is None:
+        u = np.random.random(n)
+        return np.flatnonzero(u < head / n), np.flatnonzero((u >= head / n) & (u < k / n))
+    idx = np.arange(n) if k == n else np.argpartition(ages, n - k)[n - k:]
+    if 0 < head < k:
+        idx = idx[np.argpartition(-ages[idx], head - 1)]
+    return idx[:head], idx[head:]
+
+
+# -------------------- Битовый движок (64 клетки на слово) --------------------
+# Строка сетки хранится как uint64-слова, бит j слова k — клетка k*64+j.
+# Соседи считаются побитовыми сумматорами сразу для 64 клеток.
+
+def pack_grid_bits(grid: np.ndarray) -> np.ndarray:
+    """bool (H, W) -> uint64 (H, ceil(W/64)); лишние биты последнего слова — нули"""
+    H, W = grid.shape
+    words = (W + 63) // 64
+    packed = np.zeros((H, words * 8), dtype=np.uint8)
+    packed[:, :(W + 7) // 8] = np.packbits(grid, axis=1, bitorder='little')
+    return packed.view('<u8')
+
+def unpack_grid_bits(bits: np.ndarray, width: int) -> np.ndarray:
+    """uint64 (H, words) -> bool (H, width)"""
+    raw = np.ascontiguousarray(bits, dtype='<u8').view(np.uint8)
+    return np.unpackbits(raw, axis=1, count=width, bitorder='little').view(bool)
+
+def _bit_row_mask(width: int) -> np.ndarray:
+    """Маска значащих битов строки шириной width"""
+    words = (width + 63) // 64
+    mask = np.full(words, np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+    tail = width % 64
+    if tail:
+        mask[-1] = np.uint64((1 << tail) - 1)
+    return mask
+
+def _shift_west(x: np.ndarray) -> np.ndarray:
+    """Бит j результата = клетка j-1 (сосед слева), с переносом между словами"""
+    out = x << np.uint64(1)
+    out[:, 1:] |= x[:, :-1] >> np.uint64(63)
+    return out
+
+def _shift_east(x: np.ndarray) -> np.ndarray:
+    """Бит j результата = клетка j+1 (сосед справа), с переносом между словами"""
+    out = x >> np.uint64(1)
+    out[:, :-1] |= x[:, 1:] << np.uint64(63)
+    return out
+
+def _shift_rows(x: np.ndarray, dy: int) -> np.ndarray:
+    """Строка i результата = строка i+dy исходника, за краем — нули"""
+    out = np.zeros_like(x)
+    if dy > 0:
+        out[:-dy] = x[dy:]
     else:
-        new = grid.copy()
-    
+        out[-dy:] = x[:dy]
+    return out
+
+def _bit_neighbor_planes(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Число соседей 0..8 в виде четырёх битовых плоскостей (1, 2, 4, 8)"""
+    up = _shift_rows(x, -1)
+    down = _shift_rows(x, 1)
+    n = (_shift_west(up), up, _shift_east(up),
+         _shift_west(x), _shift_east(x),
+         _shift_west(down), down, _shift_east(down))
+
+    # Полные сумматоры: три тройки дают разряды веса 1 и 2
+    def full_add(a, b, c):
+        ab = a ^ b
+        return ab ^ c, (a & b) | (ab & c)
+
+    s0, c0 = full_add(n[0], n[1], n[2])
+    s1, c1 = full_add(n[3], n[4], n[5])
+    s2, c2 = n[6] ^ n[7], n[6] & n[7]
+    bit0, c3 = full_add(s0, s1, s2)
+    # Разряды веса 2: c0 + c1 + c2 + c3
+    t0, d0 = full_add(c0, c1, c2)
+    bit1 = t0 ^ c3
+    d1 = t0 & c3
+    # Разряды веса 4: d0 + d1
+    return bit0, bit1, d0 ^ d1, d0 & d1
+
+def _bit_count_mask(planes, counts) -> np.ndarray:
+    """Маска клеток, у которых число соседей входит в counts"""
+    b0, b1, b2, b3 = planes
+    result = np.zeros_like(b0)
+    for c in counts:
+        m = b0 if c & 1 else ~b0
+        m = m & (b1 if c & 2 else ~b1)
+        m &= b2 if c & 4 else ~b2
+        m &= b3 if c & 8 else ~b3
+        result |= m
+    return result
+
+def step_life_bits(bits: np.ndarray, table: np.ndarray, width: int) -> np.ndarray:
+    """Один шаг автомата над упакованной сеткой по таблице правила (2, 9)"""
+    planes = _bit_neighbor_planes(bits)
+    born = _bit_count_mask(planes, np.flatnonzero(table[0]).tolist())
+    survive = _bit_count_mask(planes, np.flatnonzero(table[1]).tolist())
+    new = (born & ~bits) | (survive & bits)
+    new &= _bit_row_mask(width)
     return new
 
+def step_life_bitboard(grid: np.ndarray, rule: str, steps: int = 1) -> np.ndarray:
+    """Битовый аналог step_life: упаковка, steps поколений, распаковка"""
+    table = rule_table(rule)
+    if table is None:
+        return grid.copy()
+    W = grid.shape[1]
+    bits = pack_grid_bits(grid)
+    for _ in range(max(1, steps)):
+        bits = step_life_bits(bits, table, W)
+    return unpack_grid_bits(bits, W)
+
+# -------------------- HashLife (мемоизированное дерево квадрантов) --------------------
+
+HASHLIFE_MAX_NODES = 1 << 20  # Бюджет узлов: при превышении прогон прерывается, кэши сбрасываются
+HASHLIFE_TIME_BUDGET = 2.0    # Бюджет времени одного прогона, с
+# Правила, растущие без предела: дерево не перестаёт расти, HashLife их не считает.
+# Правила с B1/B2 (Seeds, Replicator, Gnarl) растут со скоростью света и отсекаются по таблице
+HASHLIFE_UNBOUNDED_RULES = frozenset({"Maze", "Coral", "LifeWithoutDeath"})
+
+class _HLNode:
+    """Квадрат 2^level×2^level из четырёх детей a b / c d; для уровней 0-2 — код клеток"""
+    __slots__ = ("level", "a", "b", "c", "d", "pop", "code")
+
+    def __init__(self, level, a, b, c, d, pop, code=-1):
+        self.level = level
+        self.a, self.b, self.c, self.d = a, b, c, d
+        self.pop = pop
+        self.code = code
+
+def _spread2(code: int) -> int:
+    """Код 2×2 (бит r*2+c) -> биты квадрата 4×4 (бит r*4+c)"""
+    return (code & 3) | ((code >> 2) & 3) << 4
+
+@lru_cache(maxsize=1)
+def _hashlife_blocks() -> np.ndarray:
+    """Код листа 4×4 -> маска (4, 4) bool для распаковки в сетку"""
+    codes = np.arange(1 << 16, dtype=np.int64)
+    blocks = ((codes[:, None] >> np.arange(16)) & 1).astype(bool).reshape(-1, 4, 4)
+    blocks.flags.writeable = False
+    return blocks
+
+class HashLifeEngine:
+    """
+    HashLife для одного правила: канонические узлы и кэш результатов.
+
+    advance(node, j) возвращает центральный квадрат узла уровня n через
+    2^j поколений (j <= n-2). Правила с B0 не поддерживаются: пустота
+    должна оставаться пустой. Не поддерживаются и правила без предела роста
+    (B1/B2, HASHLIFE_UNBOUNDED_RULES). Прогон, вышедший за бюджет узлов
+    или времени, прерывается RuntimeError.
+    """
+
+    def __init__(self, rule: str):
+        table = rule_table(rule)
+        if table is None or table[0, 0]:
+            raise ValueError(f"HashLife: правило {rule!r} не поддерживается")
+        if table[0, 1] or table[0, 2] or any(np.array_equal(table, rule_table(r))
+                                             for r in HASHLIFE_UNBOUNDED_RULES):
+            raise ValueError(f"HashLife: правило {rule!r} растёт без предела")
+        self.rule = rule
+        self._deadline: Optional[float] = None
+        # Один шаг для всех листов 4×4: код 16 бит -> код центра 2×2
+        bits = (np.arange(1 << 16)[:, None] >> np.arange(16)) & 1
+        bits = bits.reshape(-1, 4, 4)
+        step = np.zeros(1 << 16, dtype=np.int64)
+        for i, (r, c) in enumerate(((1, 1), (1, 2), (2, 1), (2, 2))):
+            neighbors = bits[:, r-1:r+2, c-1:c+2].sum(axis=(1, 2)) - bits[:, r, c]
+            step |= table[bits[:, r, c], neighbors].astype(np.int64) << i
+        self._leaf_step = step.tolist()
+        self.clear()
+
+    def clear(self):
+        """Сбрасывает кэши; уже выданные узлы остаются корректными"""
+        self._nodes: Dict[tuple, _HLNode] = {}
+        self._results: Dict[tuple, _HLNode] = {}
+        off = _HLNode(0, None, None, None, None, 0, 0)
+        on = _HLNode(0, None, None, None, None, 1, 1)
+        self._cells = (off, on)
+        self._level1 = [self.join(*(self._cells[(code >> i) & 1] for i in range(4)))
+                        for code in range(16)]
+        self._empty = [off, self._level1[0]]
+        self._leaves: Dict[int, _HLNode] = {}
+
+    def join(self, a: _HLNode, b: _HLNode, c: _HLNode, d: _HLNode) -> _HLNode:
+        key = (a, b, c, d)
+        node = self._nodes.get(key)
+        if node is None:
+            level = a.level + 1
+            if level == 1:
+                code = a.code | b.code << 1 | c.code << 2 | d.code << 3
+            elif level == 2:
+                code = (_spread2(a.code) | _spread2(b.code) << 2 |
+                        _spread2(c.code) << 8 | _spread2(d.code) << 10)
+            else:
+                code = -1
+            node = _HLNode(level, a, b, c, d, a.pop + b.pop + c.pop + d.pop, code)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level: int) -> _HLNode:
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def leaf(self, code: int) -> _HLNode:
+        """Узел уровня 2 по коду 4×4 (бит r*4+c)"""
+        node = self._leaves.get(code)
+        if node is None:
+            quads = [((code >> (r * 4 + c)) & 1) | ((code >> (r * 4 + c + 1)) & 1) << 1 |
+                     ((code >> (r * 4 + c + 4)) & 1) << 2 | ((code >> (r * 4 + c + 5)) & 1) << 3
+                     for r, c in ((0, 0), (0, 2), (2, 0), (2, 2))]
+            node = self._leaves[code] = self.join(*(self._level1[q] for q in quads))
+        return node
+
+    def centre(self, node: _HLNode) -> _HLNode:
+        return self.join(node.a.d, node.b.c, node.c.b, node.d.a)
+
+    def advance(self, node: _HLNode, j: int) -> _HLNode:
+        if node.pop == 0:
+            return self.empty(node.level - 1)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+        if node.level == 2:
+            result = self._level1[self._leaf_step[node.code]]
+        else:
+            self._check_budget()
+            j = min(j, node.level - 2)
+            join = self.join
+            a, b, c, d = node.a, node.b, node.c, node.d
+            # Девять перекрывающихся квадратов уровня n-1
+            parts = (a, join(a.b, b.a, a.d, b.c), b,
+                     join(a.c, a.d, c.a, c.b), join(a.d, b.c, c.b, d.a), join(b.c, b.d, d.a, d.b),
+                     c, join(c.b, d.a, c.d, d.c), d)
+            if j == node.level - 2:
+                # Полный шаг: две половины по 2^(n-3) поколений
+                m = [self.advance(p, j - 1) for p in parts]
+                j -= 1
+            else:
+                # Короткий шаг: первая половина без продвижения, только центры
+                m = [self.centre(p) for p in parts]
+            result = join(self.advance(join(m[0], m[1], m[3], m[4]), j),
+                          self.advance(join(m[1], m[2], m[4], m[5]), j),
+                          self.advance(join(m[3], m[4], m[6], m[7]), j),
+                          self.advance(join(m[4], m[5], m[7], m[8]), j))
+        self._results[key] = result
+        return result
+
+    def _check_budget(self):
+        if len(self._nodes) > HASHLIFE_MAX_NODES:
+            self.clear()
+            raise RuntimeError(f"HashLife: больше {HASHLIFE_MAX_NODES} узлов")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise RuntimeError(f"HashLife: прогон дольше {HASHLIFE_TIME_BUDGET:.1f} с")
+
+    # --- Вселенная: корень и положение его левого верхнего угла в клетках сетки ---
+
+    def from_grid(self, grid: np.ndarray) -> Tuple[_HLNode, int, int]:
+        H, W = grid.shape
+        size = 8
+        while size < max(H, W):
+            size *= 2
+        cells = np.zeros((size, size), dtype=np.int64)
+        cells[:H, :W] = grid
+        blocks = cells.reshape(size // 4, 4, size // 4, 4).transpose(0, 2, 1, 3).reshape(size // 4, size // 4, 16)
+        codes = blocks @ (1 << np.arange(16, dtype=np.int64))
+        nodes = [[self.leaf(code) for code in row] for row in codes.tolist()]
+        while len(nodes) > 1:
+            nodes = [[self.join(top[x], top[x + 1], bottom[x], bottom[x + 1])
+                      for x in range(0, len(top), 2)]
+                     for top, bottom in zip(nodes[0::2], nodes[1::2])]
+        return nodes[0][0], 0, 0
+
+    def to_grid(self, root: _HLNode, top: int, left: int, shape: Tuple[int, int]) -> np.ndarray:
+        """Видимое окно (0, 0)-shape вселенной как плотная сетка"""
+        H, W = shape
+        out = np.zeros((H + 4, W + 4), dtype=bool)  # запас под листы у края
+        blocks = _hashlife_blocks()
+        stack = [(root, top, left)]
+        while stack:
+            node, r, c = stack.pop()
+            side = 1 << node.level
+            if node.pop == 0 or r >= H or c >= W or r + side <= 0 or c + side <= 0:
+                continue
+            if node.level == 2:
+                if r >= 0 and c >= 0:
+                    out[r:r+4, c:c+4] = blocks[node.code]
+                else:
+                    r0, c0 = max(r, 0), max(c, 0)
+                    out[r0:r+4, c0:c+4] = blocks[node.code][r0-r:, c0-c:]
+                continue
+            half = side >> 1
+            stack.extend(((node.a, r, c), (node.b, r, c + half),
+                          (node.c, r + half, c), (node.d, r + half, c + half)))
+        return out[:H, :W].copy()
+
+    def expand(self, root: _HLNode, top: int, left: int) -> Tuple[_HLNode, int, int]:
+        """Корень уровня n+1 с прежним корнем в центре"""
+        e = self.empty(root.level - 1)
+        half = 1 << (root.level - 1)
+        return (self.join(self.join(e, e, e, root.a), self.join(e, e, root.b, e),
+                          self.join(e, root.c, e, e), self.join(root.d, e, e, e)),
+                top - half, left - half)
+
+    def run(self, root: _HLNode, top: int, left: int, generations: int,
+            time_budget: Optional[float] = HASHLIFE_TIME_BUDGET) -> Tuple[_HLNode, int, int]:
+        """
+        Продвигает вселенную на generations поколений степенями двойки.
+        При выходе за бюджет бросает RuntimeError; переданный корень остаётся корректным.
+        """
+        if len(self._nodes) > HASHLIFE_MAX_NODES // 2:
+            self.clear()
+        self._deadline = None if time_budget is None else time.monotonic() + time_budget
+        j = 0
+        while generations > 0:
+            if generations & 1:
+                # Клетки — в центральной четверти, свет за 2^j поколений не выходит из центра
+                while root.level < j + 3 or self.centre(self.centre(root)).pop != root.pop:
+                    self._check_budget()
+                    root, top, left = self.expand(root, top, left)
+                quarter = 1 << (root.level - 2)
+                root, top, left = self.advance(root, j), top + quarter, left + quarter
+            generations >>= 1
+            j += 1
+        # Обрезаем пустые поля вокруг
+        while root.level > 3 and self.centre(root).pop == root.pop:
+            quarter = 1 << (root.level - 2)
+            root, top, left = self.centre(root), top + quarter, left + quarter
+        return root, top, left
+
+@lru_cache(maxsize=16)
+def hashlife_engine(rule: str) -> Optional[HashLifeEngine]:
+    """Общий движок HashLife для правила или None, если правило не подходит"""
+    try:
+        return HashLifeEngine(rule)
+    except ValueError:
+        return None
+
+class HashLifeStepper:
+    """
+    Вселенная HashLife на бесконечном поле. За краем сетки клетки продолжают
+    жить и могут вернуться при следующем вызове, поэтому результат — не то же,
+    что тики ограниченного поля или тора (их перематывает LifeStepper.fast_forward).
+    Если сетку между вызовами изменили, вселенная пересобирается из окна.
+    Правила, которые HashLife не считает, идут обычными шагами ограниченного поля.
+    """
+
+    def __init__(self):
+        self.engine: Optional[HashLifeEngine] = None
+        self.root: Optional[_HLNode] = None
+        self.top = self.left = 0
+        self._shown: Optional[np.ndarray] = None
+
+    def step(self, grid: np.ndarray, rule: str, generations: int = 1) -> np.ndarray:
+        engine = hashlife_engine(rule)
+        if engine is None:
+            if rule_table(rule) is None:
+                raise ValueError(f"rule {rule!r} has no B/S table")
+            out = grid
+            for _ in range(max(1, generations)):
+                out = step_life(out, rule)
+            return out
+        if (engine is not self.engine or self._shown is None
+                or self._shown.shape != grid.shape or not np.array_equal(self._shown, grid)):
+            self.root, self.top, self.left = engine.from_grid(grid)
+            self.engine = engine
+        self.root, self.top, self.left = engine.run(self.root, self.top, self.left, max(1, generations))
+        out = engine.to_grid(self.root, self.top, self.left, grid.shape)
+        self._shown = out.copy()
+        return out
+
+def step_life_hashlife(grid: np.ndarray, rule: str, steps: int = 1) -> np.ndarray:
+    """HashLife за один вызов: дерево из сетки, steps поколений, окно обратно в сетку"""
+    return HashLifeStepper().step(grid, rule, steps)
+
 # -------------------- Спавн --------------------
 
 # Spawn methods configuration
@@ -3109,7 +4335,144 @@ SPAWN_METHODS = [
     "Линии",                     # Горизонтальные/вертикальные линии
     "Кресты",                    # Крестообразные паттерны
     "Кольца",                    # Круглые структуры
+    "Библиотека паттернов",      # Паттерны из patterns/ (RLE, .cells)
 ]
+LIBRARY_SPAWN_METHOD = "Библиотека паттернов"
+PATTERN_SPAWN_PREFIX = "Паттерн: "  # Метод спавна одного паттерна библиотеки: префикс + имя
+
+_SPAWN_RNG = np.random.default_rng()
+
+# Паттерны спавна
+GLIDER_PATTERN = np.array([
+    [False, True,  False],
+    [False, False, True ],
+    [True,  True,  True ]
+])
+OSCILLATOR_PATTERNS = [
+    np.array([[True, True, True]]),  # Мигалка, период 2
+    np.array([
+        [False, True,  True,  True ],
+        [True,  True,  True,  False]
+    ]),  # Жаба, период 2
+    np.array([
+        [True,  True,  False, False],
+        [True,  True,  False, False],
+        [False, False, True,  True ],
+        [False, False, True,  True ]
+    ]),  # Маяк, период 2
+]
+CROSS_PATTERN = np.array([
+    [False, True,  False],
+    [True,  True,  True ],
+    [False, True,  False]
+])
+RING_PATTERN = np.array([
+    [False, True,  True,  True,  False],
+    [True,  False, False, False, True ],
+    [True,  False, False, False, True ],
+    [True,  False, False, False, True ],
+    [False, True,  True,  True,  False]
+])
+LINE_LENGTHS = range(3, 8)
+
+class PatternStamps:
+    """
+    Маски паттернов, заранее уложенные в стек (K, PH, PW) для пакетного спавна.
+
+    cells — клетки паттерна, boxes — его рамка h×w в левом верхнем углу стека;
+    weights — вероятности выбора масок (None — равновероятно).
+    """
+
+    def __init__(self, masks: List[np.ndarray], weights: Optional[List[float]] = None):
+        masks = [np.asarray(m, dtype=bool) for m in masks]
+        self.shapes = np.array([m.shape for m in masks], dtype=np.intp)
+        PH, PW = self.shapes.max(axis=0)
+        self.cells = np.zeros((len(masks), PH, PW), dtype=bool)
+        self.boxes = np.zeros_like(self.cells)
+        for k, m in enumerate(masks):
+            self.cells[k, :m.shape[0], :m.shape[1]] = m
+            self.boxes[k, :m.shape[0], :m.shape[1]] = True
+        self.offsets = np.indices((PH, PW))
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.population = max(1, int(round(np.mean([np.count_nonzero(m) for m in masks]))))
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+BLOCK_STAMPS = PatternStamps([np.ones((2, 2), dtype=bool)])
+GLIDER_STAMPS = PatternStamps([GLIDER_PATTERN])
+OSCILLATOR_STAMPS = PatternStamps(OSCILLATOR_PATTERNS)
+CROSS_STAMPS = PatternStamps([CROSS_PATTERN])
+RING_STAMPS = PatternStamps([RING_PATTERN])
+H_LINE_STAMPS = PatternStamps([np.ones((1, n), dtype=bool) for n in LINE_LENGTHS])
+V_LINE_STAMPS = PatternStamps([np.ones((n, 1), dtype=bool) for n in LINE_LENGTHS])
+
+def spawn_patterns(grid: np.ndarray, stamps: PatternStamps, count: int,
+                   attempts: int = 10, margin: Tuple[int, int] = (2, 2)) -> int:
+    """
+    Пакетный спавн: ставит до count паттернов (случайная маска набора) на свободные места.
+
+    Начала всех попыток всех паттернов выбираются разом; занятость рамок
+    проверяется одной выборкой окон из сетки, и каждый паттерн берёт первую
+    свободную попытку. Пересечения паттернов между собой разрешаются в пользу
+    меньшего индекса (как при поочерёдной расстановке), принятые ставятся одним
+    scatter, проигравшие перепроверяют оставшиеся попытки. Начало паттерна h×w
+    берётся из [2, H - h - margin[0]) × [2, W - w - margin[1]). Возвращает число
+    поставленных паттернов.
+    """
+    H, W = grid.shape
+    if count <= 0 or not len(stamps):
+        return 0
+    cells, boxes = stamps.cells, stamps.boxes
+    r_hi = H - stamps.shapes[:, 0] - margin[0]
+    c_hi = W - stamps.shapes[:, 1] - margin[1]
+    fitting = np.flatnonzero((r_hi > 2) & (c_hi > 2))
+    if fitting.size == 0:
+        return 0
+
+    # Маска каждого места и все его попытки: (count, attempts)
+    if stamps.weights is None:
+        kind = fitting[_SPAWN_RNG.integers(0, fitting.size, count)]
+    else:
+        w = stamps.weights[fitting]
+        kind = _SPAWN_RNG.choice(fitting, count, p=w / w.sum())
+    r = _SPAWN_RNG.integers(2, r_hi[kind][:, None], (count, attempts))
+    c = _SPAWN_RNG.integers(2, c_hi[kind][:, None], (count, attempts))
+    dy, dx = stamps.offsets
+    box = boxes[kind][:, None]
+    claim = np.empty(H * W, dtype=np.intp)
+
+    placed = 0
+    pending = np.arange(count)
+    first = np.zeros(count, dtype=np.intp)  # Первая ещё не опробованная попытка
+    while pending.size:
+        rows = np.minimum(r[pending][..., None, None] + dy, H - 1)
+        cols = np.minimum(c[pending][..., None, None] + dx, W - 1)
+        # Рамка попытки должна быть пустой (максимум по окну); выборка по (rows, cols)
+        # видит сетку с любыми шагами — после fliplr/flipud это вид, а не копия
+        free = ~(grid[rows, cols] & box[pending]).any(axis=(2, 3))
+        free &= np.arange(attempts) >= first[pending][:, None]
+        has_free = free.any(axis=1)
+        pending = pending[has_free]
+        if not pending.size:
+            break
+        choice = free[has_free].argmax(axis=1)
+        idx = np.arange(pending.size)
+        rows = rows[has_free][idx, choice]
+        cols = cols[has_free][idx, choice]
+        pbox = box[pending, 0]
+        # Клетку рамки получает паттерн с меньшим индексом: запись в обратном порядке
+        flat = (rows * W + cols)[pbox]
+        ids = np.broadcast_to(idx[:, None, None], pbox.shape)[pbox]
+        claim[flat[::-1]] = ids[::-1]
+        accepted = np.ones(pending.size, dtype=bool)
+        accepted[ids[claim[flat] != ids]] = False
+        stamp = cells[kind[pending]] & accepted[:, None, None]
+        grid[rows[stamp], cols[stamp]] = True
+        placed += int(np.count_nonzero(accepted))
+        first[pending] = choice + 1
+        pending = pending[~accepted]
+    return placed
 
 def spawn_cells_random_points(grid: np.ndarray, count: int) -> None:
     """Классический случайный спавн отдельных клеток"""
@@ -3117,106 +4480,38 @@ def spawn_cells_random_points(grid: np.ndarray, count: int) -> None:
     if count <= 0:
         return
     
-    # Создаем случайные координаты с отступом от краев
+    # Все попытки (count * 3) разом, с отступом от краев
     margin = 2
-    attempts = 0
-    spawned = 0
-    
-    while spawned < count and attempts < count * 3:  # Ограничиваем попытки
-        r = random.randrange(margin, H - margin)
-        c = random.randrange(margin, W - margin)
-        
-        # Проверяем, свободна ли клетка
-        if not grid[r, c]:
-            grid[r, c] = True
-            spawned += 1
-        
-        attempts += 1
+    r = _SPAWN_RNG.integers(margin, H - margin, count * 3)
+    c = _SPAWN_RNG.integers(margin, W - margin, count * 3)
+    # Свободная клетка засчитывается первой попыткой, попавшей в неё
+    free = np.flatnonzero(~grid[r, c])
+    _, first = np.unique(r[free] * W + c[free], return_index=True)
+    keep = free[np.sort(first)[:count]]
+    grid[r[keep], c[keep]] = True
 
 def spawn_cells_stable_blocks(grid: np.ndarray, count: int) -> None:
     """Спавн стабильных блоков 2x2 (текущий метод)"""
     H, W = grid.shape
     if count <= 0 or H < 4 or W < 4:
         return
-    
-    blocks_to_create = max(1, count // 4)  # Один блок = 4 клетки
-    
-    created_blocks = 0
-    for _ in range(blocks_to_create):
-        attempts = 0
-        while attempts < 10:  # Максимум 10 попыток
-            r = random.randrange(2, H - 4)  # Увеличиваем отступ
-            c = random.randrange(2, W - 4)
-            
-            # Проверим, свободно ли место 2x2
-            if not grid[r:r+2, c:c+2].any():
-                grid[r:r+2, c:c+2] = True
-                created_blocks += 1
-                break
-            attempts += 1
+    # Один блок = 4 клетки
+    spawn_patterns(grid, BLOCK_STAMPS, max(1, count // 4))
 
 def spawn_cells_gliders(grid: np.ndarray, count: int) -> None:
     """Спавн глайдеров (движущихся паттернов)"""
     H, W = grid.shape
     if count <= 0 or H < 6 or W < 6:
         return
-    
-    # Паттерн глайдера
-    glider_pattern = np.array([
-        [False, True,  False],
-        [False, False, True ],
-        [True,  True,  True ]
-    ])
-    
-    gliders_to_create = max(1, count // 5)  # Один глайдер = 5 клеток
-    
-    for _ in range(gliders_to_create):
-        attempts = 0
-        while attempts < 10:
-            r = random.randrange(2, H - 5)
-            c = random.randrange(2, W - 5)
-            
-            # Проверяем область 3x3 для глайдера
-            if not grid[r:r+3, c:c+3].any():
-                grid[r:r+3, c:c+3] = glider_pattern
-                break
-            attempts += 1
+    # Один глайдер = 5 клеток
+    spawn_patterns(grid, GLIDER_STAMPS, max(1, count // 5))
 
 def spawn_cells_oscillators(grid: np.ndarray, count: int) -> None:
     """Спавн осцилляторов (мигающих паттернов)"""
     H, W = grid.shape
     if count <= 0 or H < 5 or W < 5:
         return
-    
-    # Различные осцилляторы
-    blinker = np.array([[True, True, True]])  # Период 2
-    toad = np.array([
-        [False, True,  True,  True ],
-        [True,  True,  True,  False]
-    ])  # Период 2
-    beacon = np.array([
-        [True,  True,  False, False],
-        [True,  True,  False, False],
-        [False, False, True,  True ],
-        [False, False, True,  True ]
-    ])  # Период 2
-    
-    patterns = [blinker, toad, beacon]
-    oscillators_to_create = max(1, count // 6)
-    
-    for _ in range(oscillators_to_create):
-        pattern = random.choice(patterns)
-        ph, pw = pattern.shape
-        
-        attempts = 0
-        while attempts < 10:
-            r = random.randrange(2, H - ph - 2)
-            c = random.randrange(2, W - pw - 2)
-            
-            if not grid[r:r+ph, c:c+pw].any():
-                grid[r:r+ph, c:c+pw] = pattern
-                break
-            attempts += 1
+    spawn_patterns(grid, OSCILLATOR_STAMPS, max(1, count // 6))
 
 def spawn_cells_mixed(grid: np.ndarray, count: int) -> None:
     """Смешанный спавн различных типов паттернов"""
@@ -3241,78 +4536,182 @@ def spawn_cells_lines(grid: np.ndarray, count: int) -> None:
         return
     
     lines_to_create = max(1, count // 5)  # Одна линия ≈ 5 клеток
-    
-    for _ in range(lines_to_create):
-        if random.random() < 0.5:
-            # Горизонтальная линия
-            length = min(random.randrange(3, 8), W - 4)
-            r = random.randrange(2, H - 2)
-            c = random.randrange(2, W - length - 2)
-            
-            if not grid[r, c:c+length].any():
-                grid[r, c:c+length] = True
-        else:
-            # Вертикальная линия
-            length = min(random.randrange(3, 8), H - 4)
-            r = random.randrange(2, H - length - 2)
-            c = random.randrange(2, W - 2)
-            
-            if not grid[r:r+length, c].any():
-                grid[r:r+length, c] = True
+    # Половина горизонтальных, половина вертикальных; у линии одна попытка
+    horizontal = int(_SPAWN_RNG.binomial(lines_to_create, 0.5))
+    spawn_patterns(grid, H_LINE_STAMPS, horizontal, attempts=1, margin=(1, 2))
+    spawn_patterns(grid, V_LINE_STAMPS, lines_to_create - horizontal, attempts=1, margin=(2, 1))
 
 def spawn_cells_crosses(grid: np.ndarray, count: int) -> None:
     """Спавн крестообразных паттернов"""
     H, W = grid.shape
     if count <= 0 or H < 6 or W < 6:
         return
-    
-    # Паттерн креста
-    cross_pattern = np.array([
-        [False, True,  False],
-        [True,  True,  True ],
-        [False, True,  False]
-    ])
-    
-    crosses_to_create = max(1, count // 5)  # Один крест = 5 клеток
-    
-    for _ in range(crosses_to_create):
-        attempts = 0
-        while attempts < 10:
-            r = random.randrange(2, H - 5)
-            c = random.randrange(2, W - 5)
-            
-            if not grid[r:r+3, c:c+3].any():
-                grid[r:r+3, c:c+3] = cross_pattern
-                break
-            attempts += 1
+    # Один крест = 5 клеток
+    spawn_patterns(grid, CROSS_STAMPS, max(1, count // 5))
 
 def spawn_cells_rings(grid: np.ndarray, count: int) -> None:
     """Спавн кольцевых структур"""
     H, W = grid.shape
     if count <= 0 or H < 8 or W < 8:
         return
-    
-    # Простое кольцо 5x5
-    ring_pattern = np.array([
-        [False, True,  True,  True,  False],
-        [True,  False, False, False, True ],
-        [True,  False, False, False, True ],
-        [True,  False, False, False, True ],
-        [False, True,  True,  True,  False]
-    ])
-    
-    rings_to_create = max(1, count // 12)  # Одно кольцо ≈ 12 клеток
-    
-    for _ in range(rings_to_create):
-        attempts = 0
-        while attempts < 10:
-            r = random.randrange(2, H - 7)
-            c = random.randrange(2, W - 7)
-            
-            if not grid[r:r+5, c:c+5].any():
-                grid[r:r+5, c:c+5] = ring_pattern
-                break
-            attempts += 1
+    # Простое кольцо 5x5, одно кольцо ≈ 12 клеток
+    spawn_patterns(grid, RING_STAMPS, max(1, count // 12))
+
+# -------------------- Библиотека паттернов --------------------
+
+PATTERNS_DIR = "patterns"  # Каталог файлов паттернов (Golly RLE, plaintext .cells)
+
+_RLE_TOKEN = re.compile(r"(\d*)([p-y][A-X]|[bo.A-X$!])")
+
+def _trim_pattern(mask: np.ndarray) -> np.ndarray:
+    """Обрезает пустые поля вокруг живых клеток"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return np.zeros((0, 0), dtype=bool)
+    return np.ascontiguousarray(mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1])
+
+def parse_rle(text: str) -> Tuple[Optional[str], np.ndarray]:
+    """Разбирает Golly RLE: (имя из #N или None, bool-маска); многоцветные состояния считаются живыми"""
+    name = None
+    body = []
+    width = height = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#'):
+            if line[:2] in ('#N', '#n') and line[2:].strip():
+                name = line[2:].strip()
+            continue
+        if not body and line.startswith('x') and '=' in line:
+            fields = dict(part.split('=', 1) for part in line.replace(' ', '').split(',') if '=' in part)
+            width, height = int(fields.get('x', 0)), int(fields.get('y', 0))
+            continue
+        body.append(line)
+        if '!' in line:
+            break
+    cells = []
+    row = col = 0
+    for run, tag in _RLE_TOKEN.findall(''.join(body)):
+        n = int(run) if run else 1
+        if tag == '!':
+            break
+        if tag == '$':
+            row += n
+            col = 0
+        elif tag in ('b', '.'):
+            col += n
+        else:
+            cells.extend((row, col + k) for k in range(n))
+            col += n
+    if cells:
+        height = max(height, max(r for r, _ in cells) + 1)
+        width = max(width, max(c for _, c in cells) + 1)
+    mask = np.zeros((height, width), dtype=bool)
+    if cells:
+        mask[tuple(np.array(cells).T)] = True
+    return name, mask
+
+def parse_cells(text: str) -> Tuple[Optional[str], np.ndarray]:
+    """Разбирает plaintext .cells: (имя из !Name: или None, bool-маска); живые — 'O' и '*'"""
+    name = None
+    rows = []
+    for line in text.splitlines():
+        if line.startswith('!'):
+            if line[1:].lower().startswith('name:'):
+                name = line[6:].strip() or None
+            continue
+        rows.append(line.rstrip())
+    width = max((len(r) for r in rows), default=0)
+    mask = np.zeros((len(rows), width), dtype=bool)
+    for y, line in enumerate(rows):
+        for x, ch in enumerate(line):
+            mask[y, x] = ch in 'O*'
+    return name, mask
+
+def pattern_variants(mask: np.ndarray) -> List[np.ndarray]:
+    """Все различные повороты и отражения маски (до 8)"""
+    variants = {}
+    for k in range(4):
+        rotated = np.rot90(mask, k)
+        for m in (rotated, rotated[:, ::-1]):
+            variants.setdefault((m.shape, m.tobytes()), np.ascontiguousarray(m))
+    return list(variants.values())
+
+class PatternLibrary:
+    """
+    Паттерны для спавна: встроенные и загруженные из каталога patterns/.
+
+    Для каждого паттерна при загрузке готовится PatternStamps со всеми его
+    поворотами и отражениями, так что спавн ничего не пересобирает.
+    """
+
+    BUILTIN = {
+        "Glider": GLIDER_PATTERN,
+        "Blinker": OSCILLATOR_PATTERNS[0],
+        "Toad": OSCILLATOR_PATTERNS[1],
+        "Beacon": OSCILLATOR_PATTERNS[2],
+    }
+
+    def __init__(self, directory: Optional[str] = None):
+        self.masks: Dict[str, np.ndarray] = {}
+        self.stamps: Dict[str, PatternStamps] = {}
+        self.file_names: List[str] = []
+        for name, mask in self.BUILTIN.items():
+            self.add(name, mask)
+        if directory:
+            self.load_directory(directory)
+        self.all_stamps = self._combine(self.file_names or list(self.stamps))
+
+    def add(self, name: str, mask: np.ndarray) -> None:
+        mask = _trim_pattern(np.asarray(mask, dtype=bool))
+        if mask.size == 0:
+            return
+        self.masks[name] = mask
+        self.stamps[name] = PatternStamps(pattern_variants(mask))
+
+    def load_directory(self, directory: str) -> None:
+        """Загружает *.rle и *.cells; имя — из файла или по имени файла"""
+        if not os.path.isdir(directory):
+            return
+        for filename in sorted(os.listdir(directory)):
+            base, ext = os.path.splitext(filename)
+            parser = {'.rle': parse_rle, '.cells': parse_cells}.get(ext.lower())
+            if parser is None:
+                continue
+            try:
+                with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                    name, mask = parser(f.read())
+                name = name or base
+                self.add(name, mask)
+                if name in self.stamps and name not in self.file_names:
+                    self.file_names.append(name)
+            except Exception as e:
+                print(f"Warning: failed to load pattern {filename}: {e}")
+
+    def _combine(self, names: List[str]) -> Optional[PatternStamps]:
+        """Общий набор масок: паттерн выбирается равновероятно, затем его вариант"""
+        masks, weights = [], []
+        for name in names:
+            variants = pattern_variants(self.masks[name])
+            masks.extend(variants)
+            weights.extend([1.0 / len(variants)] * len(variants))
+        return PatternStamps(masks, weights) if masks else None
+
+@lru_cache(maxsize=1)
+def pattern_library() -> PatternLibrary:
+    """Библиотека паттернов из каталога patterns/ (ищется через resource_manager)"""
+    path = resource_manager.get_resource_path(PATTERNS_DIR) if resource_manager else None
+    if path is None:
+        path = os.path.join(os.path.dirname(__file__) if "__file__" in globals() else ".", PATTERNS_DIR)
+    return PatternLibrary(str(path))
+
+def spawn_cells_library(grid: np.ndarray, count: int, name: Optional[str] = None) -> None:
+    """Спавн паттернов библиотеки (name — один паттерн, иначе случайные из всей библиотеки)"""
+    library = pattern_library()
+    stamps = library.stamps.get(name) if name else library.all_stamps
+    if count <= 0 or stamps is None:
+        return
+    spawn_patterns(grid, stamps, max(1, count // stamps.population))
 
 def spawn_cells(grid: np.ndarray, count: int, method: str = "Стабильные блоки") -> None:
     """Главная функция спавна с выбором метода"""
@@ -3332,6 +4731,10 @@ def spawn_cells(grid: np.ndarray, count: int, method: str = "Стабильны
         spawn_cells_crosses(grid, count)
     elif method == "Кольца":
         spawn_cells_rings(grid, count)
+    elif method == LIBRARY_SPAWN_METHOD:
+        spawn_cells_library(grid, count)
+    elif method.startswith(PATTERN_SPAWN_PREFIX):
+        spawn_cells_library(grid, count, method[len(PATTERN_SPAWN_PREFIX):])
     else:
         # Fallback к стабильным блокам
         spawn_cells_stable_blocks(grid, count)
@@ -3357,6 +4760,9 @@ class LayerConfig:
     palette_mix: float = 0.5  # Баланс между палитрами: 0.0=только возраст, 1.0=только RMS
     spawn_method: str = "Стабильные блоки"  # Метод спавна клеток
     spawn_percent: int = 30  # Процент от максимального спавна (0-300%)
+    engine: str = "dense"  # "dense" | "bitboard" — движок шага автомата
+    topology: str = "bounded"  # "bounded" | "torus" — топология поля
+    tick_ms: int = 0  # Собственный интервал тика слоя, мс; 0 — глобальные часы
 
 
 class LayerGenerator:
@@ -3405,7 +4811,10 @@ class LayerGenerator:
             solo=config.solo,
             mute=config.mute,
             palette_mix=config.palette_mix,
-            spawn_method=config.spawn_method
+            spawn_method=config.spawn_method,
+            engine=config.engine,
+            topology=config.topology,
+            tick_ms=config.tick_ms
         )
     
     def generate_multiple_layers(self, layer_configs: List[LayerConfig]) -> List[Layer]:
@@ -3505,104 +4914,99 @@ class LayerGenerator:
 
 # -------------------- Цветовые функции --------------------
 
+def upscale_cells(dst: np.ndarray, cells: np.ndarray, cell_size: int):
+    """
+    Nearest-neighbour увеличение клеток прямо в пиксели Surface без копий.
+
+    dst — вид surfarray (pixels2d / pixels3d / pixels_alpha) формы (W*cs, H*cs[, C]);
+    cells — (H, W[, C]). dst раскладывается stride-трюком на блоки клеток,
+    в которые одним присваиванием пишется broadcast-вид cells.
+    """
+    h, w = cells.shape[:2]
+    s0, s1 = dst.strides[:2]
+    blocks = np.lib.stride_tricks.as_strided(
+        dst, shape=(h, cell_size, w, cell_size) + dst.shape[2:],
+        strides=(s1 * cell_size, s1, s0 * cell_size, s0) + dst.strides[2:])
+    blocks[...] = np.broadcast_to(cells[:, None, :, None], blocks.shape)
+
+
 class RenderManager:
+    """
+    Композитор слоёв в координатах клеток.
+
+    Слои смешиваются в постоянный буфер (H, W, 3) uint8 через blend_colors_array
+    с альфой каждой клетки; в пиксели поля результат масштабируется один раз
+    за кадр в present() через upscale_cells — без промежуточных Surface.
+    """
+
+    # Имена режимов смешивания слоя -> режим blend_colors_array
+    BLEND_MODES = {
+        "add": "additive", "additive": "additive", "blend_add": "additive",
+        "multiply": "multiply", "mult": "multiply", "blend_mult": "multiply",
+        "screen": "screen", "overlay": "overlay",
+    }
+
     def __init__(self, w_cells: int, h_cells: int, cell_size: int):
         self.wc = w_cells; self.hc = h_cells; self.cs = cell_size
         self.canvas = pygame.Surface((w_cells * cell_size, h_cells * cell_size)).convert()
+        self.accum = np.zeros((h_cells, w_cells, 3), dtype=np.uint8)  # Композит в клетках
+        self._alpha = np.zeros((h_cells, w_cells), dtype=np.float32)   # Альфа текущего слоя, 0..1
+        self.frame_key = None  # Ключ готового композита, см. App.render
+        # 32-битный canvas: пишем упакованные пиксели через pixels2d (в 3 раза меньше элементов)
+        if self.canvas.get_bytesize() == 4:
+            self._shifts = self.canvas.get_shifts()[:3]
+            self._packed = np.empty((h_cells, w_cells), dtype=np.uint32)
+            self._packed_tmp = np.empty((h_cells, w_cells), dtype=np.uint32)
+        else:
+            self._packed = None
 
     def clear(self, color=BG_COLOR):
-        self.canvas.fill(color)
+        self.accum[:] = color
 
-    def _has_layer_masks(self):
-        """Helper to check if both last_age_mask and last_grid_mask exist."""
-        return hasattr(self, 'last_age_mask') and hasattr(self, 'last_grid_mask')
+    def _color_alpha(self, color_img: np.ndarray, alpha_live: int) -> np.ndarray:
+        """Альфа без маски слоя: чёрный — прозрачный, остальное с alpha_live"""
+        alpha = self._alpha
+        alpha.fill(0.0)
+        alpha[color_img.any(axis=2)] = alpha_live / 255.0
+        return alpha
 
-    def blit_layer(self, color_img: np.ndarray, mix: str, alpha_live: int = 255, alpha_old: int = 255):
-        """color_img: (H,W,3) uint8 в координатах клеток."""
+    def blit_layer(self, color_img: np.ndarray, mix: str, alpha_live: int = 255, alpha_old: int = 255,
+                   alpha: Optional[np.ndarray] = None):
+        """
+        color_img: (H,W,3) uint8 в координатах клеток; смешивается в accum с альфой клеток.
+        alpha — готовая маска (H,W) 0..1 из build_color_image; без неё альфа берётся по цвету.
+        """
         try:
-            h, w = color_img.shape[:2]
-            # ИСПРАВЛЕНИЕ: Используем nearest neighbor для точного масштабирования без интерполяции
-            # Создаем поверхность точно по размеру клеток
-            rgb_surf = pygame.surfarray.make_surface(np.transpose(color_img, (1, 0, 2)))
-            # Масштабируем с nearest neighbor (без интерполяции) для четких границ
-            scaled_size = (w * self.cs, h * self.cs)  # w*8, h*8
-            rgb_surf = pygame.transform.scale(rgb_surf, scaled_size)
-            # Применяем альфа
-            rgb_surf.set_colorkey((0, 0, 0))  # Черный = прозрачный
-
-            # --- Корректная генерация альфа-канала для каждого слоя ---
-            if self._has_layer_masks():
-                age_mask = self.last_age_mask
-                grid_mask = self.last_grid_mask
-                max_age = getattr(self, 'last_max_age', 60)
-                old_mask = (age_mask >= max_age) & grid_mask
-                live_mask = (age_mask < max_age) & grid_mask
-
-                surf_w, surf_h = rgb_surf.get_size()
-                mask_shape = age_mask.shape
-                alpha_arr = np.zeros(mask_shape, dtype=np.uint8)
-                alpha_arr[live_mask] = np.uint8(alpha_live)
-                alpha_arr[old_mask] = np.uint8(alpha_old)
-
-                # Масштабируем альфа-маску до размера поверхности
-                if alpha_arr.shape != (surf_h, surf_w):
-                    alpha_arr_t = np.transpose(alpha_arr, (1, 0))
-                    try:
-                        from scipy.ndimage import zoom
-                        zoom_y = surf_h / alpha_arr_t.shape[1]
-                        zoom_x = surf_w / alpha_arr_t.shape[0]
-                        scaled_alpha_arr = zoom(alpha_arr_t, (zoom_x, zoom_y), order=0)
-                        scaled_alpha_arr = scaled_alpha_arr.astype(np.uint8)
-                    except ImportError:
-                        alpha_mask_surf = pygame.surfarray.make_surface(np.stack([alpha_arr_t]*3, axis=-1))
-                        alpha_mask_surf = pygame.transform.scale(alpha_mask_surf, (surf_w, surf_h))
-                        scaled_alpha_arr = pygame.surfarray.array3d(alpha_mask_surf)[:,:,0].astype(np.uint8)
-                else:
-                    scaled_alpha_arr = np.transpose(alpha_arr, (1, 0)).astype(np.uint8)
-
-                # Диагностика: вывод уникальных значений альфа-маски
-                print(f"Alpha mask unique values after scaling: {np.unique(scaled_alpha_arr)}")
-
-                rgb_surf = rgb_surf.convert_alpha()
-                alpha_pixels = pygame.surfarray.pixels_alpha(rgb_surf)
-                alpha_pixels[:, :] = scaled_alpha_arr
-                del alpha_pixels
-            else:
-                # Fallback: если нет маски, применяем глобальный alpha ко всему слою
-                rgb_surf.set_alpha(np.uint8(alpha_live))
-            mode = (mix or "normal")
+            if color_img.shape != self.accum.shape:
+                raise ValueError(f"layer image {color_img.shape} != compositor {self.accum.shape}")
             try:
-                mode_l = mode.lower()
+                mode = self.BLEND_MODES.get((mix or "normal").lower(), "normal")
             except Exception:
-                mode_l = "normal"
-            if mode_l in ("add", "additive", "blend_add"):
-                self.canvas.blit(rgb_surf, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
-            elif mode_l in ("multiply", "mult", "blend_mult"):
-                self.canvas.blit(rgb_surf, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
-            elif mode_l in ("screen",):
-                arr_canvas = pygame.surfarray.pixels3d(self.canvas)
-                arr_new = pygame.surfarray.pixels3d(rgb_surf)
-                out = arr_canvas.astype(np.uint16) + arr_new.astype(np.uint16) - (arr_canvas.astype(np.uint16) * arr_new.astype(np.uint16)) // 255
-                np.clip(out, 0, 255, out=out)
-                arr_canvas[:] = out.astype(np.uint8)
-                del arr_canvas, arr_new
-            else:
-                self.canvas.blit(rgb_surf, (0, 0))
+                mode = "normal"
+            if alpha is None or alpha.shape != color_img.shape[:2]:
+                alpha = self._color_alpha(color_img, alpha_live)
+            blend_colors_array(self.accum, color_img, alpha, mode, out=self.accum)
         except Exception as e:
             print(f"ERROR in blit_layer: {e}")
             print(f"Image shape: {color_img.shape}, mix: {mix}")
             import traceback
             traceback.print_exc()
-            # Fallback: always define surf
-            surf = pygame.surfarray.make_surface(np.transpose(color_img, (1, 0, 2)))
-            surf = pygame.transform.scale(surf, self.canvas.get_size())
-            surf.set_colorkey((0, 0, 0))
-            surf.set_alpha(alpha_live)
-            surf.set_alpha(alpha_old)
-            if mix == "Additive":
-                self.canvas.blit(surf, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
-            else:
-                self.canvas.blit(surf, (0, 0))
+
+    def present(self) -> pygame.Surface:
+        """Переносит композит в canvas: одно увеличение на кадр прямо в пиксели"""
+        if self._packed is not None:
+            packed, tmp = self._packed, self._packed_tmp
+            packed.fill(0)
+            for ch, shift in enumerate(self._shifts):
+                np.left_shift(self.accum[..., ch], shift, out=tmp, dtype=np.uint32)
+                packed |= tmp
+            pixels = pygame.surfarray.pixels2d(self.canvas)
+            upscale_cells(pixels, packed, self.cs)
+        else:
+            pixels = pygame.surfarray.pixels3d(self.canvas)
+            upscale_cells(pixels, self.accum, self.cs)
+        del pixels  # снимаем блокировку Surface
+        return self.canvas
 
 
 # -------------------- Приложение --------------------
@@ -4064,6 +5468,225 @@ class UIComboBox:
 
 # -------------------- Помощник формирования цвета клетки --------------------
 
+def fade_factors_array(ages: np.ndarray, fade_start: int, max_age: int,
+                       sat_drop_pct: float, val_drop_pct: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Векторный аналог fade_factors для массива возрастов"""
+    if max_age <= 0 or fade_start >= max_age:
+        ones = np.ones(np.shape(ages), dtype=np.float64)
+        return ones, ones
+    a = np.clip(ages, 0, max_age)
+    t = (a - fade_start) / float(max(1, max_age - fade_start))
+    t[a <= fade_start] = 0.0
+    sat_mul = np.clip(1.0 - clamp01(sat_drop_pct/100.0) * t, 0.0, 1.0)
+    val_mul = np.clip(1.0 - clamp01(val_drop_pct/100.0) * t, 0.0, 1.0)
+    return sat_mul, val_mul
+
+def _age_color_lut_array(max_age: int, rms: float, rms_strength: float,
+                         fade_start: int, sat_drop: float, val_drop: float,
+                         cmin: float, cmax: float, v_mul: float,
+                         age_palette: str, rms_mode: str, rms_enabled: bool,
+                         hue_offset: float, invert: bool) -> Optional[np.ndarray]:
+    """
+    Векторная таблица цветов по возрасту для режимов "disabled" и "brightness".
+    Возвращает None для режима "palette" (его строит _PaletteColorCube).
+    """
+    if max_age <= 0:
+        return None
+    brightness = rms_enabled and rms_mode != "disabled"
+    if brightness and rms_mode == "palette":
+        return None
+
+    ages = np.arange(max_age + 1, dtype=np.float64)
+    if max_age <= 1:
+        t_age = np.ones_like(ages)
+    else:
+        k = max(6.0, max_age / 6.0)
+        t_age = np.clip(1.0 - np.exp(-ages / k), 0.0, 1.0)
+    if invert:
+        t_age = 1.0 - t_age
+
+    h, s, v = get_palette(palette_key(age_palette)).hsv_array(t_age)
+    h = np.mod(h + hue_offset, 360.0)
+    if brightness:
+        t_rms = norm_rms_for_color(rms, cmin, cmax)
+        v = v * ((0.65 + 0.35 * (t_rms * clamp01(rms_strength))) * clamp01(v_mul))
+    else:
+        v = v * clamp01(v_mul)
+    sat_mul, val_mul = fade_factors_array(ages, fade_start, max_age, sat_drop, val_drop)
+    return hsv_to_rgb_array(h, s * sat_mul, v * val_mul)
+
+@lru_cache(maxsize=64)
+def _age_color_lut(max_age: int, rms: Optional[float], rms_strength: float,
+                   fade_start: int, sat_drop: float, val_drop: float,
+                   cmin: float, cmax: float, v_mul: float,
+                   age_palette: str, rms_palette: str,
+                   rms_mode: str, blend_mode: str, rms_enabled: bool,
+                   palette_mix: float,
+                   hue_offset: float, invert: bool) -> np.ndarray:
+    """
+    Таблица цветов (max_age+1, 3) uint8: строка i — цвет клетки возраста i.
+
+    Для режимов "disabled" и "brightness" строится векторно по реестру палитр
+    (_age_color_lut_array), иначе — скалярными функциями один раз на возраст. hue_offset и invert скалярные
+    функции читают из PALETTE_STATE, здесь они ещё и часть ключа кэша.
+    rms=None — цвет от RMS не зависит.
+    """
+    rms_val = 0.0 if rms is None else rms
+    lut = _age_color_lut_array(max_age, rms_val, rms_strength, fade_start,
+                               sat_drop, val_drop, cmin, cmax, v_mul,
+                               age_palette, rms_mode, rms_enabled, hue_offset, invert)
+    if lut is not None:
+        lut.flags.writeable = False
+        return lut
+    lut = np.empty((max_age + 1, 3), dtype=np.uint8)
+    failed = False
+    for age in range(max_age + 1):
+        try:
+            lut[age] = color_from_age_rms(age, rms_val, rms_strength,
+                                          fade_start, max_age, sat_drop, val_drop,
+                                          cmin, cmax, v_mul, age_palette, rms_palette,
+                                          rms_mode, blend_mode, rms_enabled, palette_mix)
+        except Exception as e:
+            if not failed:
+                print(f"Color LUT error ({age_palette}, age={age}): {e}")
+                failed = True
+            lut[age] = (255, 255, 255)
+    lut.flags.writeable = False
+    return lut
+
+
+# Число уровней квантования RMS в таблицах цвета и ключах кэша рендера
+RMS_COLOR_LEVELS = 64
+
+
+def rms_color_level(rms: float, cmin: float, cmax: float, levels: int = RMS_COLOR_LEVELS) -> int:
+    """Уровень квантования RMS 0..levels-1 в окне [cmin, cmax]"""
+    return int(round(norm_rms_for_color(rms, cmin, cmax) * (levels - 1)))
+
+
+def rms_level_value(level: int, cmin: float, cmax: float, levels: int = RMS_COLOR_LEVELS) -> float:
+    """RMS в середине уровня: все RMS одного уровня дают один цвет и одну таблицу"""
+    if cmax <= cmin:
+        cmax = cmin + 1e-6
+    return cmin + level / float(levels - 1) * (cmax - cmin)
+
+
+class _PaletteColorCube:
+    """
+    Таблица цветов возраст × квантованный RMS для rms_mode == "palette".
+
+    RMS постоянен в пределах кадра, поэтому кадр стоит выбора одной строки
+    и одного gather. Строки заполняются лениво, при первом попадании RMS
+    в соответствующий уровень.
+    """
+
+    def __init__(self, params: tuple, levels: int):
+        (self.age_palette, self.rms_palette, self.blend_mode, self.palette_mix,
+         self.rms_strength, self.max_age, self.fade_start, self.sat_drop,
+         self.val_drop, self.cmin, self.cmax, self.v_mul,
+         self.hue_offset, self.invert) = params
+        self.levels = levels
+        self.table = np.zeros((levels, self.max_age + 1, 3), dtype=np.uint8)
+        self.ready = np.zeros(levels, dtype=bool)
+
+    def level_for_rms(self, rms: float) -> int:
+        return rms_color_level(rms, self.cmin, self.cmax, self.levels)
+
+    def row(self, level: int) -> np.ndarray:
+        if not self.ready[level]:
+            self._fill_row(level)
+            self.ready[level] = True
+        return self.table[level]
+
+    def _fill_row(self, level: int):
+        t_rms = level / float(self.levels - 1)
+        rms_q = rms_level_value(level, self.cmin, self.cmax, self.levels)
+        # Цвет от возраста в режиме "palette" не зависит от RMS
+        age_lut = _age_color_lut(self.max_age, None, self.rms_strength,
+                                 self.fade_start, self.sat_drop, self.val_drop,
+                                 self.cmin, self.cmax, self.v_mul,
+                                 self.age_palette, self.rms_palette,
+                                 "disabled", self.blend_mode, False, self.palette_mix,
+                                 self.hue_offset, self.invert)
+        out = self.table[level]
+        try:
+            rms_color = color_from_rms(rms_q, self.rms_palette, self.cmin, self.cmax, self.v_mul)
+        except Exception as e:
+            print(f"Color cube error ({self.rms_palette}, level={level}): {e}")
+            out[:] = (255, 255, 255)
+            return
+        base_mix = clamp01(self.palette_mix)
+        rms_modulation = clamp01(t_rms * clamp01(self.rms_strength))
+        final_mix = clamp01(base_mix + rms_modulation * (1.0 - base_mix))
+        blend_colors_array(age_lut, np.asarray(rms_color, dtype=np.uint8),
+                           final_mix, self.blend_mode, out=out)
+
+
+@lru_cache(maxsize=32)
+def _palette_color_cube(age_palette: str, rms_palette: str, blend_mode: str,
+                        palette_mix: float, rms_strength: float,
+                        max_age: int, fade_start: int, sat_drop: float, val_drop: float,
+                        cmin: float, cmax: float, v_mul: float,
+                        hue_offset: float, invert: bool) -> _PaletteColorCube:
+    """Кэш таблиц возраст × RMS (LRU): ключ — палитры, режим смешивания, mix и сила RMS"""
+    params = (age_palette, rms_palette, blend_mode, palette_mix, rms_strength,
+              max_age, fade_start, sat_drop, val_drop, cmin, cmax, v_mul,
+              hue_offset, invert)
+    return _PaletteColorCube(params, RMS_COLOR_LEVELS)
+
+
+def _build_color_image_per_cell(img: np.ndarray, layer_grid: np.ndarray, layer_age: np.ndarray,
+                                rms: float, rms_strength: float, fade_start: int, max_age: int,
+                                sat_drop: float, val_drop: float, cmin: float, cmax: float,
+                                v_mul: float, age_palette: str, rms_palette: str,
+                                rms_mode: str, blend_mode: str, rms_enabled: bool,
+                                palette_mix: float) -> np.ndarray:
+    """Поклеточный расчёт — только для случаев, которые не покрывает таблица (max_age <= 0)"""
+    H, W = layer_grid.shape
+    ys, xs = np.nonzero(layer_grid)
+    for i, j in zip(ys.tolist(), xs.tolist()):
+        if i >= layer_age.shape[0] or j >= layer_age.shape[1]:
+            continue
+        try:
+            img[i, j] = color_from_age_rms(int(layer_age[i, j]), rms, rms_strength,
+                                           fade_start, max_age, sat_drop, val_drop,
+                                           cmin, cmax, v_mul, age_palette, rms_palette,
+                                           rms_mode, blend_mode, rms_enabled, palette_mix)
+        except Exception as e:
+            print(f"Color calculation error at ({i},{j}): {e}")
+            img[i, j] = (255, 255, 255)
+    return img
+
+
+def pitch_bucket(pitch: float) -> int:
+    """Четверть полутона: ключ кэша цвета для режима высоты ноты"""
+    if pitch <= 0:
+        return -1
+    return int(round(math.log2(pitch) * 48.0))
+
+
+class LayerColorCache:
+    """
+    Цветное изображение слоя между кадрами.
+
+    cells_key — состояние сетки (generation слоя и max_age), под ним
+    сохраняются плоские индексы видимых клеток и их возрасты: если сменился
+    только RMS, перекрашиваются лишь эти клетки по новой таблице.
+    color_key — полный ключ цвета; совпал — img отдаётся как есть.
+    """
+
+    def __init__(self):
+        self.img: Optional[np.ndarray] = None
+        self.flat: Optional[np.ndarray] = None
+        self.ages: Optional[np.ndarray] = None
+        self.cells_key = None
+        self.color_key = None
+
+    def invalidate(self):
+        self.cells_key = None
+        self.color_key = None
+
+
 def build_color_image(layer_grid: np.ndarray, layer_age: np.ndarray, mode: str,
                       rms: float, pitch: float, cfg: Dict[str, Any],
                       age_palette: str, rms_palette: str, 
@@ -4071,10 +5694,32 @@ def build_color_image(layer_grid: np.ndarray, layer_age: np.ndarray, mode: str,
                       blend_mode: str = "normal",
                       rms_enabled: bool = True,
                       max_age: int = 120,
-                      palette_mix: float = 0.5) -> np.ndarray:
+                      palette_mix: float = 0.5,
+                      regions: Optional[List[Tuple[slice, slice]]] = None,
+                      alpha_out: Optional[np.ndarray] = None,
+                      alpha_live: int = 255, alpha_old: int = 255,
+                      cache: Optional[LayerColorCache] = None,
+                      cells_key=None) -> np.ndarray:
+    """
+    regions — где лежат живые клетки (ActiveTiles.live_regions); None — всё поле.
+    alpha_out — (H, W) float32: тем же проходом заполняется альфа клеток 0..1
+    (живые — alpha_live, с возрастом >= max_age слоя — alpha_old, мёртвые — 0).
+    cache/cells_key — см. LayerColorCache; img тогда принадлежит кэшу.
+    """
     H, W = layer_grid.shape
-    # Временно возвращаемся к RGB (3 канала) для отладки
-    img = np.zeros((H, W, 3), dtype=np.uint8)
+    if cache is not None and cache.img is not None and cache.img.shape == (H, W, 3):
+        img = cache.img
+        if cache.cells_key is None or cache.cells_key != cells_key:
+            img.fill(0)
+    else:
+        img = np.zeros((H, W, 3), dtype=np.uint8)
+        if cache is not None:
+            cache.img = img
+            cache.cells_key = None
+    old_age = max_age  # max_age слоя; ниже max_age перекрывается глобальным из cfg
+    if alpha_out is not None:
+        alpha_out.fill(0.0)
+        a_live, a_old = alpha_live / 255.0, alpha_old / 255.0
 
     rms_strength = cfg.get('rms_strength', 100) / 100.0
     fade_start   = cfg.get('fade_start', 60)
@@ -4085,42 +5730,92 @@ def build_color_image(layer_grid: np.ndarray, layer_age: np.ndarray, mode: str,
     cmin         = cfg.get('color_rms_min', DEFAULT_COLOR_RMS_MIN)
     cmax         = cfg.get('color_rms_max', DEFAULT_COLOR_RMS_MAX)
 
-    # быстрый проход по True-ячейкам
-    ys, xs = np.nonzero(layer_grid)
-    
-    for idx, (i, j) in enumerate(zip(ys, xs)):
-        # Преобразуем индексы в int
-        i, j = int(i), int(j)
-        
-        if i < 0 or i >= H or j < 0 or j >= W:
-            continue
-            
-        if i >= layer_age.shape[0] or j >= layer_age.shape[1]:
-            continue
-            
+    # Режимы без зависимости от возраста: один цвет на весь слой
+    if mode == "Только RMS" or mode == "Высота ноты (Pitch)":
         try:
             if mode == "Только RMS":
                 color = color_from_rms(rms, rms_palette, cmin, cmax, v_mul)
-            elif mode == "Высота ноты (Pitch)":
-                color = color_from_pitch(pitch, rms, rms_strength, v_mul)
             else:
-                color = color_from_age_rms(int(layer_age[i, j]), rms, rms_strength,
-                                           fade_start, max_age, sat_drop, val_drop,
-                                           cmin, cmax, v_mul, age_palette, rms_palette,
-                                           rms_mode, blend_mode, rms_enabled, palette_mix)
-            img[i, j] = color
+                color = color_from_pitch(pitch, rms, rms_strength, v_mul)
         except Exception as e:
-            print(f"Color calculation error at ({i},{j}): {e}")
-            img[i, j] = (255, 255, 255)
+            print(f"Color calculation error: {e}")
+            color = (255, 255, 255)
+        if cache is not None:
+            cache.cells_key = None
+        for region in regions_or_full(regions):
+            mask = layer_grid[region]
+            img[region][mask] = color
+            if alpha_out is not None:
+                alpha_out[region][mask] = np.where(layer_age[region][mask] >= old_age, a_old, a_live)
+        return img
+
+    if max_age <= 0 or layer_age.shape != layer_grid.shape:
+        if cache is not None:
+            cache.cells_key = None
+        if alpha_out is not None:
+            has_age = layer_age.shape == layer_grid.shape
+            for region in regions_or_full(regions):
+                mask = layer_grid[region]
+                alpha_out[region][mask] = (np.where(layer_age[region][mask] >= old_age, a_old, a_live)
+                                           if has_age else a_live)
+        return _build_color_image_per_cell(img, layer_grid, layer_age, rms, rms_strength,
+                                           fade_start, max_age, sat_drop, val_drop, cmin, cmax,
+                                           v_mul, age_palette, rms_palette, rms_mode,
+                                           blend_mode, rms_enabled, palette_mix)
+
+    hue_offset = float(PALETTE_STATE.hue_offset)
+    invert = bool(PALETTE_STATE.invert)
+    if rms_enabled and rms_mode == "palette":
+        # Режим "palette": готовая строка таблицы возраст × RMS
+        cube = _palette_color_cube(age_palette, rms_palette, blend_mode,
+                                   float(palette_mix), float(rms_strength),
+                                   int(max_age), fade_start, sat_drop, val_drop,
+                                   cmin, cmax, float(v_mul), hue_offset, invert)
+        lut = cube.row(cube.level_for_rms(rms))
+    else:
+        # Цвет зависит от RMS только в режиме "brightness"
+        rms_key = float(rms) if (rms_enabled and rms_mode != "disabled") else None
+        lut = _age_color_lut(int(max_age), rms_key, float(rms_strength),
+                             fade_start, sat_drop, val_drop, cmin, cmax, float(v_mul),
+                             age_palette, rms_palette, rms_mode, blend_mode, bool(rms_enabled),
+                             float(palette_mix), hue_offset, invert)
+
+    if cache is not None:
+        # Выборка клеток пересобирается только после изменения сетки
+        if cache.cells_key is None or cache.cells_key != cells_key:
+            rows, cols = alive_positions(layer_grid, regions)
+            ages = layer_age[rows, cols]
+            if alpha_out is not None:
+                alpha_out[rows, cols] = np.where(ages >= old_age, a_old, a_live)
+            np.clip(ages, 0, max_age, out=ages)
+            cache.flat = rows * W + cols
+            cache.ages = ages
+            cache.cells_key = cells_key
+        elif alpha_out is not None:
+            rows, cols = np.divmod(cache.flat, W)
+            alpha_out[rows, cols] = np.where(layer_age[rows, cols] >= old_age, a_old, a_live)
+        img.reshape(-1, 3)[cache.flat] = lut[cache.ages]
+        return img
+
+    # Один gather по таблице под маской живых клеток каждого региона
+    for region in regions_or_full(regions):
+        mask = layer_grid[region]
+        ages = layer_age[region][mask]
+        if alpha_out is not None:
+            alpha_out[region][mask] = np.where(ages >= old_age, a_old, a_live)
+        np.clip(ages, 0, max_age, out=ages)
+        img[region][mask] = lut[ages]
     return img
 # -------------------- Приложение --------------------
 
 class App:
     def on_global_tick_ms_change(self, new_tick_ms):
-        """Глобальное изменение интервала тика через HUD"""
+        """Глобальное изменение интервала тика через HUD.
+
+        Слои с tick_ms == 0 идут по глобальным часам и подхватывают его сами;
+        собственные интервалы слоёв не перезаписываются.
+        """
         self.tick_ms = new_tick_ms
-        for layer in self.layers:
-            layer.tick_ms = new_tick_ms
         self.hud.update_from_app(self)
     def __init__(self, sel: Dict[str, Any]):
         self.sel = sel
@@ -4149,7 +5844,13 @@ class App:
         self.hud_last_update = 0
         self.hud_cache_valid = False
         self.renderer = RenderManager(GRID_W, GRID_H, CELL_SIZE)
+        self.fx_pipeline = FXPipeline()
         self.layers: List[Layer] = []
+        self.batch_stepper = BatchLifeStepper()  # Пакетный шаг всех слоёв
+        # Библиотека паттернов: файлы читаются и маски готовятся один раз при старте
+        self.pattern_library = pattern_library()
+        if self.pattern_library.file_names:
+            print(f" Pattern library: {', '.join(self.pattern_library.file_names)}")
         
         # Проверяем, используем ли мы конфигурацию слоёв из sel или из app_config.json
         use_config_file = sel.get('layers_different', True) and ('layers_cfg' not in sel or not sel['layers_cfg'])
@@ -4197,7 +5898,10 @@ class App:
                         'mix': mix_val,
                         'solo': bool(row.get('solo', False)),
                         'mute': bool(row.get('mute', False)),
-                        'blend_mode': blend_val,}
+                        'blend_mode': blend_val,
+                        'engine': row.get('engine', 'dense'),
+                        'topology': row.get('topology', 'bounded'),
+                        'tick_ms': int(row.get('tick_ms', 0) or 0),}
                 else:
                     # Fallback к базовым настройкам если индекс выходит за границы
                     # Debug print removed
@@ -4233,6 +5937,13 @@ class App:
         self.pitch_tick_min = sel.get('pitch_tick_min_ms', DEFAULT_PTICK_MIN_MS)
         self.pitch_tick_max = sel.get('pitch_tick_max_ms', DEFAULT_PTICK_MAX_MS)
         self.last_tick = pygame.time.get_ticks()
+        # Планировщик с фиксированным шагом: накопитель времени и замер скорости
+        self.max_catchup_steps = max(1, int(sel.get('max_catchup_steps', MAX_CATCHUP_STEPS)))
+        self.tick_accum = 0.0
+        self.global_steps = 0  # Шагов глобальных часов в текущем кадре
+        self.sim_rate = 0.0
+        self._sim_rate_gens = 0
+        self._sim_rate_start = self.last_tick
 
         # цвет/возраст
         self.max_age = sel.get('max_age', 120)
@@ -4549,9 +6260,13 @@ class App:
                 # Пересчёт клеток: очищаем слой и спавним новое количество
                 layer.grid[:] = False
                 layer.age[:] = 0
+                layer.state = None  # Угасающие состояния Generations тоже сбрасываем
                 new_cells = int(SPAWN_SCALE * (spawn_percent / 100.0))
                 spawn_cells(layer.grid, new_cells, layer.spawn_method)
                 layer.age[layer.grid] = 1
+                self._layer_tiles(layer).invalidate()
+                self._layer_stats(layer).invalidate()
+                touch_layer(layer)
                 self.save_layer_settings()
                 self.hud.update_from_app(self)  # Обновить HUD
         elif param_name.startswith('layer_') and '_blend_mode' in param_name:
@@ -4655,10 +6370,7 @@ class App:
             return
             
         # Список доступных правил
-        available_rules = [
-            "Conway", "HighLife", "Day&Night", "Replicator", 
-            "Seeds", "Maze", "Coral", "LifeWithoutDeath", "Gnarl"
-        ]
+        available_rules = list(CA_RULES)
         
         current_rule = self.layers[layer_idx].rule
         try:
@@ -4764,11 +6476,64 @@ class App:
                     (math.log2(1500.0) - math.log2(80.0)), 0.0, 1.0)
         return int(self.pitch_tick_max + (self.pitch_tick_min - self.pitch_tick_max) * p)
 
-    def soft_clear(self):
+    def _advance_clock(self, accum: float, elapsed: int, interval: int) -> Tuple[int, float]:
+        """Фиксированный шаг с накопителем: (число шагов, остаток накопителя).
+
+        Прошедшее время копится и расходуется порциями по interval; при отставании
+        больше max_catchup_steps шагов излишек отбрасывается, чтобы медленный кадр
+        не запускал лавину догоняющих шагов.
+        """
+        interval = max(1, interval)
+        accum += elapsed
+        steps = min(int(accum // interval), self.max_catchup_steps)
+        accum -= steps * interval
+        if accum >= interval:
+            accum %= interval
+        return steps, accum
+
+    def scheduled_steps(self, now: int, dyn_ms: int) -> List[int]:
+        """Сколько поколений выполнить в этом кадре для каждого слоя.
+
+        Слои с tick_ms == 0 идут по глобальным часам (dyn_ms, в т.ч. от высоты ноты),
+        остальные — по собственным; measure_sim_rate считает глобальные шаги,
+        их число в кадре остаётся в self.global_steps.
+        """
+        elapsed = max(0, now - self.last_tick)
+        self.last_tick = now
+        global_steps, self.tick_accum = self._advance_clock(self.tick_accum, elapsed, dyn_ms)
+        self.global_steps = global_steps
+        self.measure_sim_rate(now, global_steps)
+        steps = []
+        for layer in self.layers:
+            own_ms = int(getattr(layer, 'tick_ms', 0) or 0)
+            if own_ms <= 0:
+                steps.append(global_steps)
+                continue
+            n, layer.tick_accum = self._advance_clock(getattr(layer, 'tick_accum', 0.0), elapsed, own_ms)
+            steps.append(n)
+        return steps
+
+    def measure_sim_rate(self, now: int, steps: int):
+        """Фактическая скорость симуляции (поколений/с) по окну SIM_RATE_WINDOW_MS."""
+        self._sim_rate_gens += steps
+        elapsed = now - self._sim_rate_start
+        if elapsed >= SIM_RATE_WINDOW_MS:
+            self.sim_rate = self._sim_rate_gens * 1000.0 / elapsed
+            self._sim_rate_gens = 0
+            self._sim_rate_start = now
+
+    def soft_clear(self, due: Optional[List[int]] = None, fade: bool = True):
+        """
+        Мягкая очистка при тишине: отбраковка клеток слоёв due (None — всех)
+        и, если fade, затухание global_v_mul — один раз на шаг глобальных часов.
+        """
         if not self.soft_clear_enable:
             return
+        due = set(range(len(self.layers)) if due is None else due)
         # Получаем параметры из HUD для каждого слоя
         for i, layer in enumerate(self.layers):
+            if i not in due and not fade:
+                continue
             if hasattr(self, 'hud') and self.hud and i < len(self.hud.layer_modules):
                 controls = self.hud.layer_modules[i]['controls']
                 soft_kill = controls.get('soft_kill').current_val if 'soft_kill' in controls else 80
@@ -4778,53 +6543,41 @@ class App:
                 soft_kill, fade_floor, age_bias = 80, 0.6, 15
 
             if self.soft_mode == "Удалять клетки":
-                g = layer.grid
-                if not g.any(): continue
-                alive = np.argwhere(g)
-                k = int(len(alive) * soft_kill / 100.0)
-                if k > 0:
-                    if self.old_cells_priority:
-                        alive_positions = np.where(g)
-                        ages = layer.age[alive_positions]
-                        sorted_indices = np.argsort(ages)[::-1]
-                        remove_indices = sorted_indices[:k]
-                        remove_r = alive_positions[0][remove_indices]
-                        remove_c = alive_positions[1][remove_indices]
-                        g[remove_r, remove_c] = False
-                    else:
-                        pick = alive[np.random.choice(len(alive), size=k, replace=False)]
-                        g[pick[:, 0], pick[:, 1]] = False
+                if i in due:
+                    self._cull_layer(layer, soft_kill)
             elif self.soft_mode == "Затухание клеток":
-                self.global_v_mul = max(fade_floor,
-                                        self.global_v_mul * (1.0 - self.soft_fade_down / 100.0))
+                if fade:
+                    self.global_v_mul = max(fade_floor,
+                                            self.global_v_mul * (1.0 - self.soft_fade_down / 100.0))
             elif self.soft_mode == "Затухание + удаление":
-                self.global_v_mul = max(fade_floor,
-                                        self.global_v_mul * (1.0 - self.soft_fade_down / 100.0))
-                fade_kill_rate = soft_kill * 0.5
-                g = layer.grid
-                if not g.any(): continue
-                alive = np.argwhere(g)
-                k = int(len(alive) * fade_kill_rate / 100.0)
-                if k > 0:
-                    if self.old_cells_priority:
-                        alive_positions = np.where(g)
-                        ages = layer.age[alive_positions]
-                        sorted_indices = np.argsort(ages)[::-1]
-                        remove_indices = sorted_indices[:k]
-                        remove_r = alive_positions[0][remove_indices]
-                        remove_c = alive_positions[1][remove_indices]
-                        g[remove_r, remove_c] = False
-                    else:
-                        pick = alive[np.random.choice(len(alive), size=k, replace=False)]
-                        g[pick[:, 0], pick[:, 1]] = False
+                if fade:
+                    self.global_v_mul = max(fade_floor,
+                                            self.global_v_mul * (1.0 - self.soft_fade_down / 100.0))
+                if i in due:
+                    fade_kill_rate = soft_kill * 0.5
+                    self._cull_layer(layer, fade_kill_rate)
                         
-    def soft_population_control(self):
+    def _cull_layer(self, layer: Layer, percent: float):
+        """Убирает percent% живых клеток слоя: самые старые или случайные"""
+        g = layer.grid
+        rows, cols = alive_positions(g, self._layer_tiles(layer).live_regions)
+        k = int(rows.size * percent / 100.0)
+        if k <= 0:
+            return
+        ages = layer.age[rows, cols] if self.old_cells_priority else None
+        kill, _ = cull_indices(rows.size, k, k, ages)
+        g[rows[kill], cols[kill]] = False
+        self._layer_stats(layer).population = rows.size - kill.size
+        touch_layer(layer)
+
+    def soft_population_control(self, due: Optional[List[int]] = None):
         """Оптимизированная универсальная мягкая система контроля популяции для всех правил"""
         if not self.soft_clear_enable:
             return
         total_grid_size = GRID_H * GRID_W
         debug_info = []
-        for i, layer in enumerate(self.layers):
+        for i in range(len(self.layers)) if due is None else due:
+            layer = self.layers[i]
             if hasattr(self, 'hud') and self.hud and i < len(self.hud.layer_modules):
                 controls = self.hud.layer_modules[i]['controls']
                 soft_kill = controls.get('soft_kill').current_val if 'soft_kill' in controls else 80
@@ -4835,7 +6588,8 @@ class App:
             else:
                 soft_kill, fade_floor, age_bias, max_cells_percent, clear_threshold = 80, 0.6, 15, 27, 58
 
-            total_cells = np.sum(layer.grid)
+            regions = self._layer_tiles(layer).live_regions
+            total_cells = layer_population(layer)
             max_allowed_cells = int(total_grid_size * max_cells_percent / 100.0)
             clear_threshold_cells = int(total_grid_size * clear_threshold / 100.0)
 
@@ -4855,38 +6609,41 @@ class App:
 
             removal_rate = min(removal_rate, total_cells)
 
-            alive_mask = layer.grid
-            if not np.any(alive_mask):
+            if total_cells == 0:
                 continue
 
-            alive_r, alive_c = np.where(alive_mask)
-            ages = layer.age[alive_r, alive_c]
-
-            if self.old_cells_priority and age_bias > np.random.randint(0, 100):
-                sorted_indices = np.argsort(-ages)
-            else:
-                sorted_indices = np.random.permutation(len(ages))
-
+            alive_r, alive_c = alive_positions(layer.grid, regions)
             num_to_remove = min(removal_rate, len(alive_r))
             if num_to_remove <= 0:
                 continue
 
-            remove_indices = sorted_indices[:num_to_remove]
+            # Старые первыми — частичный выбор вместо полной сортировки, иначе случайные
+            if self.old_cells_priority and age_bias > np.random.randint(0, 100):
+                ages = layer.age[alive_r, alive_c]
+            else:
+                ages = None
+            # В режиме "Затухание + удаление" первая половина удаляется, вторая затухает
+            half_point = num_to_remove // 2 if self.soft_mode == "Затухание + удаление" else num_to_remove
+            kill, fade = cull_indices(len(alive_r), num_to_remove, half_point, ages)
+            remove_indices = np.concatenate([kill, fade])
             remove_r = alive_r[remove_indices]
             remove_c = alive_c[remove_indices]
+            num_to_remove = remove_indices.size
+            half_point = kill.size
 
             if self.soft_mode == "Удалять клетки":
                 layer.grid[remove_r, remove_c] = False
                 layer.age[remove_r, remove_c] = 0
+                self._layer_stats(layer).population = total_cells - num_to_remove
                 debug_info[-1] += f" → removed {num_to_remove} cells instantly"
             elif self.soft_mode == "Затухание клеток":
                 layer.age[remove_r, remove_c] = np.maximum(0, layer.age[remove_r, remove_c] - 10)
-                zero_age_mask = layer.age == 0
-                layer.grid[zero_age_mask] = False
+                for region in regions_or_full(regions):
+                    zero_age_mask = layer.age[region] == 0
+                    layer.grid[region][zero_age_mask] = False
+                self._layer_stats(layer).population = count_alive(layer.grid, regions)
                 debug_info[-1] += f" → aged {num_to_remove} cells"
             elif self.soft_mode == "Затухание + удаление":
-                half_point = num_to_remove // 2
-
                 if half_point > 0:
                     layer.grid[remove_r[:half_point], remove_c[:half_point]] = False
                     layer.age[remove_r[:half_point], remove_c[:half_point]] = 0
@@ -4895,8 +6652,10 @@ class App:
                     fade_r = remove_r[half_point:]
                     fade_c = remove_c[half_point:]
                     layer.age[fade_r, fade_c] = np.maximum(0, layer.age[fade_r, fade_c] - 10)
-                    zero_age_mask = layer.age == 0
-                    layer.grid[zero_age_mask] = False
+                    for region in regions_or_full(regions):
+                        zero_age_mask = layer.age[region] == 0
+                        layer.grid[region][zero_age_mask] = False
+                self._layer_stats(layer).population = count_alive(layer.grid, regions)
 
         if debug_info:
             self.debug_counter = getattr(self, 'debug_counter', 0) + 1
@@ -4911,8 +6670,13 @@ class App:
     def soft_recover(self):
         self.global_v_mul = min(1.0, self.global_v_mul * (1.0 + self.soft_fade_up / 100.0))
 
-    def update_layers(self, births: int):
-        """Оптимизированное обновление слоев с векторизованными операциями"""
+    def update_layers(self, births: int, due: Optional[List[int]] = None):
+        """Оптимизированное обновление слоев с векторизованными операциями.
+
+        due — индексы слоёв, чьи часы дошли до тика (None — все слои);
+        остальные слои в этом шаге не спавнятся, не стареют и не считаются.
+        """
+        indices = range(len(self.layers)) if due is None else due
         # Векторизованное распределение рождений по слоям с учетом процентных настроек
         if births > 0 and self.layers:
             # Максимальное количество клеток от RMS = SPAWN_BASE + (SPAWN_SCALE * 3)
@@ -4920,7 +6684,8 @@ class App:
             births = min(births, max_births)
             # Для каждого слоя применяем его индивидуальный процент
             if hasattr(self, 'hud') and self.hud and hasattr(self.hud, 'layer_modules'):
-                for i, layer in enumerate(self.layers):
+                for i in indices:
+                    layer = self.layers[i]
                     if i < len(self.hud.layer_modules):
                         module = self.hud.layer_modules[i]
                         if 'controls' in module and 'spawn_percent' in module['controls']:
@@ -4945,22 +6710,44 @@ class App:
         else:
             random_increment = False
         
-        for i, layer in enumerate(self.layers):
+        if fractional_part > 0:
+            effective_increment = age_increment + (1 if random_increment else 0)
+        else:
+            effective_increment = age_increment
+
+        # 1. Векторизованное обновление возраста только для живых клеток
+        for i in indices:
+            layer = self.layers[i]
             try:
-                # Векторизованное увеличение возраста
-                if fractional_part > 0:
-                    effective_increment = age_increment + (1 if random_increment else 0)
-                else:
-                    effective_increment = age_increment
-                
-                # Векторизованное обновление возраста только для живых клеток
-                alive_mask = layer.grid
-                layer.age[alive_mask] += effective_increment
-                layer.age[~alive_mask] = 0
-                
-                # Обновление правил CA
-                layer.grid = step_life(layer.grid, layer.rule)
-                
+                tiles = self._layer_tiles(layer)
+                state = self._layer_generations_state(layer)
+                # У Generations угасающие клетки тоже активны
+                tiles.update(layer.grid if state is None else state, layer.rule,
+                             getattr(layer, 'engine', 'dense'), getattr(layer, 'topology', 'bounded'))
+                # Вне активных плиток клетки мертвы и возраст уже нулевой
+                regions = tiles.age_regions if layer.age.shape == layer.grid.shape else None
+                cap = min(layer.max_age, AGE_HIST_MAX) if layer.max_age > 0 else AGE_HIST_MAX
+                hist = np.zeros(cap + 1, dtype=np.int64)
+                for region in regions_or_full(regions):
+                    alive_mask = layer.grid[region]
+                    age = layer.age[region]
+                    live_ages = age[alive_mask] + effective_increment
+                    age[alive_mask] = live_ages
+                    age[~alive_mask] = 0
+                    # Гистограмма возраста — попутно, из уже выбранных возрастов
+                    hist += np.bincount(np.minimum(live_ages, cap), minlength=cap + 1)
+                self._layer_stats(layer).age_hist = hist
+            except Exception as e:
+                self._recover_layer(i, layer, e)
+
+        # 2. Обновление правил CA: все слои одним проходом
+        self.step_all_layers(due)
+
+        # 3. Постобработка слоёв
+        for i in indices:
+            layer = self.layers[i]
+            try:
+                tiles = self._layer_tiles(layer)
                 # SAFETY: Векторизованная проверка и восстановление формы сетки
                 if layer.grid.shape != (GRID_H, GRID_W):
                     # print(f" CRITICAL: Layer {i} grid shape corrupted: {layer.grid.shape} != ({GRID_H}, {GRID_W})")
@@ -4971,57 +6758,224 @@ class App:
                         copy_w = min(layer.grid.shape[1], GRID_W)
                         new_grid[:copy_h, :copy_w] = layer.grid[:copy_h, :copy_w]
                     layer.grid = new_grid
+                    tiles.invalidate()
                 
                 # SAFETY: Векторизованная проверка формы массива возраста
                 if layer.age.shape != layer.grid.shape:
                     # print(f" CRITICAL: Layer {i} age shape mismatch: {layer.age.shape} != {layer.grid.shape}")
                     layer.age = np.zeros_like(layer.grid, dtype=np.int32)
+                    tiles.invalidate()
                 
-                # Векторизованная очистка краев для предотвращения визуального "выползания"
-                layer.grid[[0, -1], :] = False  # Верхний и нижний края одновременно
-                layer.grid[:, [0, -1]] = False  # Левый и правый края одновременно
-                
-                # Убираем debug проверки координат для улучшения производительности
-                # if np.any(layer.grid):
-                #     live_coords = np.where(layer.grid)
-                #     max_r, max_c = np.max(live_coords[0]), np.max(live_coords[1])
-                #     min_r, min_c = np.min(live_coords[0]), np.min(live_coords[1])
-                #     
-                #     if max_r >= GRID_H or max_c >= GRID_W or min_r < 0 or min_c < 0:
-                #         print(f"WARNING: Layer {i} has cells at invalid coords: r=[{min_r}, {max_r}], c=[{min_c}, {max_c}]")
-                #     
-                #     if max_r >= GRID_H-1 or max_c >= GRID_W-1 or min_r <= 0 or min_c <= 0:
-                #         print(f"EDGE CHECK: Layer {i} has cells near edges: r=[{min_r}, {max_r}], c=[{min_c}, {max_c}]")
+                # Векторизованная очистка краев для предотвращения визуального "выползания";
+                # на торе краёв нет, поле используется целиком
+                if getattr(layer, 'topology', 'bounded') != 'torus':
+                    layer.grid[[0, -1], :] = False  # Верхний и нижний края одновременно
+                    layer.grid[:, [0, -1]] = False  # Левый и правый края одновременно
                 
                 # Векторизованное зеркалирование
                 if self.mirror_x:
                     layer.grid = np.fliplr(layer.grid)
                 if self.mirror_y:
                     layer.grid = np.flipud(layer.grid)
+                if getattr(layer, 'state', None) is not None:
+                    if layer.state.shape != layer.grid.shape:
+                        layer.state = layer.grid.astype(np.uint8)
+                    if self.mirror_x:
+                        layer.state = np.fliplr(layer.state)
+                    if self.mirror_y:
+                        layer.state = np.flipud(layer.state)
+                tiles.mirror(self.mirror_x, self.mirror_y)
                 
                 # Удаляем клетки, которые достигли максимального возраста для этого слоя
-                old_cells_mask = layer.age >= layer.max_age
-                layer.grid[old_cells_mask] = False
-                layer.age[old_cells_mask] = 0
+                regions = tiles.age_regions if layer.max_age > 0 else None
+                for region in regions_or_full(regions):
+                    age = layer.age[region]
+                    old_cells_mask = age >= layer.max_age
+                    layer.grid[region][old_cells_mask] = False
+                    age[old_cells_mask] = 0
+
+                # Население после шага и чисток — только по регионам с живыми клетками
+                self._layer_stats(layer).population = count_alive(layer.grid, tiles.live_regions)
                     
             except Exception as e:
-                print(f"   ERROR updating layer {i}: {e}")
-                print(f"   Layer rule: {getattr(layer, 'rule', 'Unknown')}")
-                print(f"   Grid shape: {getattr(layer.grid, 'shape', 'Unknown') if hasattr(layer, 'grid') else 'No grid'}")
-                
-                # Emergency fallback - recreate layer
-                try:
-                    layer.grid = np.zeros((GRID_H, GRID_W), dtype=bool)
-                    layer.age = np.zeros((GRID_H, GRID_W), dtype=np.int32)
-                    print(f"   Emergency recovery: Layer {i} reset")
-                except Exception as recovery_error:
-                    print(f"    Recovery failed: {recovery_error}")
+                self._recover_layer(i, layer, e)
+        
+        # Применяем мягкий контроль популяции для обновлённых слоев
+        self.soft_population_control(due)
+        for i in indices:
+            touch_layer(self.layers[i])
+
+    def step_all_layers(self, due: Optional[List[int]] = None):
+        """Шаг автомата для слоёв due (None — всех): dense-слои с сеткой GRID_H×GRID_W — одним пакетом"""
+        batch = []
+        if due is not None and getattr(self, 'batch_stepper', None) is not None:
+            # Пропускающий шаг слой не должен ссылаться на буфер, который пакет перезапишет
+            skipped = set(range(len(self.layers))) - set(due)
+            for i in skipped:
+                layer = self.layers[i]
+                if self.batch_stepper.owns(layer.grid):
+                    layer.grid = layer.grid.copy()
+        for i in range(len(self.layers)) if due is None else due:
+            layer = self.layers[i]
+            try:
+                engine = getattr(layer, 'engine', 'dense')
+                topology = getattr(layer, 'topology', 'bounded')
+                # Регионы плиток — только для ограниченного поля
+                regions = self._layer_tiles(layer).step_regions if topology != 'torus' else None
+                state = getattr(layer, 'state', None)
+                if state is None and engine == 'dense' and regions is None and layer.grid.shape == (GRID_H, GRID_W):
+                    batch.append(layer)
+                    continue
+                old = layer.grid
+                stepper = getattr(layer, 'stepper', None)
+                if stepper is None:
+                    stepper = layer.stepper = LifeStepper()
+                if state is not None:
+                    # Generations: одна выборка по (состояние, соседи) для любого движка
+                    layer.state = stepper.step_generations(state, layer.rule, topology)
+                    layer.grid = layer.state == 1
+                    # Угасающие состояния окрашиваются по возрасту из таблицы
+                    dying = layer.state >= 2
+                    layer.age[dying] = generations_age_lut(rule_states(layer.rule), int(layer.max_age))[layer.state[dying]]
+                elif engine == 'dense' and regions is not None:
+                    # Редкая активность: считаем только активные плитки
+                    layer.grid = stepper.step_regions(layer.grid, layer.rule, regions)
+                else:
+                    layer.grid = stepper.step(layer.grid, layer.rule, engine, topology)
+                stats = self._layer_stats(layer)
+                stats.births, stats.deaths = count_births_deaths(old, layer.grid, regions)
+            except Exception as e:
+                self._recover_layer(i, layer, e)
+        if not batch:
+            return
+        if getattr(self, 'batch_stepper', None) is None:
+            self.batch_stepper = BatchLifeStepper()
+        try:
+            grids = self.batch_stepper.step([layer.grid for layer in batch],
+                                            [layer.rule for layer in batch],
+                                            [getattr(layer, 'topology', 'bounded') for layer in batch])
+            for layer, grid in zip(batch, grids):
+                stats = self._layer_stats(layer)
+                stats.births, stats.deaths = count_births_deaths(layer.grid, grid)
+                layer.grid = grid
+        except Exception as e:
+            print(f"   ERROR in batched step: {e}")
+            for layer in batch:
+                grid = step_life(layer.grid, layer.rule, topology=getattr(layer, 'topology', 'bounded'))
+                stats = self._layer_stats(layer)
+                stats.births, stats.deaths = count_births_deaths(layer.grid, grid)
+                layer.grid = grid
+
+    def fast_forward_layer(self, index: int, generations: Optional[int] = None) -> None:
+        """
+        Перематывает слой на generations поколений (по умолчанию 2^FAST_FORWARD_LOG2)
+        теми же шагами и с той же чисткой краёв, что и на тике; спавн, отбраковка
+        и зеркалирование не повторяются. Дольше FAST_FORWARD_TIME_BUDGET перемотка
+        прерывается, и слой остаётся прежним.
+        """
+        if not (0 <= index < len(self.layers)):
+            return
+        if generations is None:
+            generations = 1 << FAST_FORWARD_LOG2
+        layer = self.layers[index]
+        # Свои буферы: сетка слоя после тика может лежать в буферах layer.stepper,
+        # а при прерывании перемотки она должна остаться нетронутой
+        stepper = LifeStepper()
+        topology = getattr(layer, 'topology', 'bounded')
+        start = time.time()
+        deadline = time.monotonic() + FAST_FORWARD_TIME_BUDGET
+        try:
+            state = self._layer_generations_state(layer)
+            if state is not None:
+                # Generations / Larger-than-Life: перематываем шагами по состояниям
+                layer.state = stepper.fast_forward_states(state, layer.rule, generations, topology, deadline)
+                layer.grid = layer.state == 1
+            else:
+                layer.grid = stepper.fast_forward(layer.grid, layer.rule, generations, topology, deadline)
+        except ValueError as e:
+            print(f" Layer {index+1} cannot be fast-forwarded: {e}")
+            return
+        except TimeoutError as e:
+            print(f" Layer {index+1} fast-forward aborted, layer unchanged: {e}")
+            return
+        except Exception as e:
+            print(f" Fast-forward error in layer {index+1}: {e}")
+            return
+        # Возраст выживших клеток сохраняем, новые начинают с 1
+        layer.age[~layer.grid] = 0
+        layer.age[layer.grid & (layer.age == 0)] = 1
+        if state is not None:
+            # Угасающие состояния окрашиваются по возрасту из таблицы, как на тике
+            dying = layer.state >= 2
+            layer.age[dying] = generations_age_lut(rule_states(layer.rule), int(layer.max_age))[layer.state[dying]]
+        self._layer_tiles(layer).invalidate()
+        self._layer_stats(layer).invalidate()
+        touch_layer(layer)
+        print(f" Layer {index+1} fast-forwarded by {generations} generations "
+              f"in {(time.time() - start) * 1000:.0f} ms, {layer_population(layer)} cells")
+
+    def _layer_generations_state(self, layer: Layer) -> Optional[np.ndarray]:
+        """uint8-состояния слоя с правилом Generations, согласованные с grid; иначе None"""
+        if not rule_uses_states(layer.rule):
+            layer.state = None
+            return None
+        state = getattr(layer, 'state', None)
+        if state is None or state.shape != layer.grid.shape:
+            state = layer.state = layer.grid.astype(np.uint8)
+        else:
+            sync_generations_state(state, layer.grid)
+        return state
+
+    def _layer_stats(self, layer: Layer) -> LayerStats:
+        stats = getattr(layer, 'stats', None)
+        if stats is None:
+            stats = layer.stats = LayerStats()
+        return stats
+
+    def _layer_alpha_mask(self, layer: Layer) -> Tuple[np.ndarray, tuple]:
+        """Постоянный буфер альфы слоя и ключ его актуальности"""
+        mask = getattr(layer, 'alpha_mask', None)
+        if mask is None or mask.shape != layer.grid.shape:
+            mask = layer.alpha_mask = np.zeros(layer.grid.shape, dtype=np.float32)
+            layer.alpha_key = None
+        key = (getattr(layer, 'generation', 0), layer.alpha_live, layer.alpha_old, layer.max_age)
+        return mask, key
+
+    def _layer_color_cache(self, layer: Layer) -> LayerColorCache:
+        cache = getattr(layer, 'color_cache', None)
+        if cache is None:
+            cache = layer.color_cache = LayerColorCache()
+        return cache
+
+    def total_population(self) -> int:
+        """Живые клетки всех слоёв из кэша статистики (годится и для других потоков)"""
+        return sum(layer_population(layer) for layer in list(self.layers))
+
+    def _layer_tiles(self, layer: Layer) -> ActiveTiles:
+        tiles = getattr(layer, 'tiles', None)
+        if tiles is None:
+            tiles = layer.tiles = ActiveTiles()
+        return tiles
+
+    def _recover_layer(self, i: int, layer: Layer, e: Exception):
+        """Сообщает об ошибке обновления слоя и сбрасывает его сетку"""
+        print(f"   ERROR updating layer {i}: {e}")
+        print(f"   Layer rule: {getattr(layer, 'rule', 'Unknown')}")
+        print(f"   Grid shape: {getattr(layer.grid, 'shape', 'Unknown') if hasattr(layer, 'grid') else 'No grid'}")
         
-        # Применяем мягкий контроль популяции для всех слоев
-        self.soft_population_control()
+        # Emergency fallback - recreate layer
+        try:
+            layer.grid = np.zeros((GRID_H, GRID_W), dtype=bool)
+            layer.age = np.zeros((GRID_H, GRID_W), dtype=np.int32)
+            layer.state = None
+            self._layer_tiles(layer).invalidate()
+            self._layer_stats(layer).population = 0
+            touch_layer(layer)
+            print(f"   Emergency recovery: Layer {i} reset")
+        except Exception as recovery_error:
+            print(f"    Recovery failed: {recovery_error}")
 
     def render(self, rms: float, pitch: float):
-        self.renderer.clear(BG_COLOR)
         cfg = dict(
             rms_strength=self.rms_strength,
             fade_start=self.fade_start,
@@ -5043,20 +6997,57 @@ class App:
         #     print(f"  Layer {idx}: solo={layer.solo}, mute={layer.mute}, rule={layer.rule}, cells={np.sum(layer.grid)}")
         # print(f"RENDER DEBUG: Solos found={len(solos)}, Will render={len(layers)} layers")
         
+        # RMS квантуется: внутри уровня таблицы цвета и кэши слоёв не меняются
+        rms_level = rms_color_level(rms, self.color_rms_min, self.color_rms_max)
+        rms_q = rms_level_value(rms_level, self.color_rms_min, self.color_rms_max)
+        color_mode = "Возраст + RMS"
+        pitch_key = pitch_bucket(pitch) if color_mode == "Высота ноты (Pitch)" else None
+        style_key = (tuple(cfg.values()), rms_level, pitch_key,
+                     float(PALETTE_STATE.hue_offset), bool(PALETTE_STATE.invert))
+
+        # Ключи слоёв; совпали с прошлым кадром — композит в renderer.accum уже готов
+        plan = []
+        for layer in layers:
+            cells_key = (getattr(layer, 'generation', 0), self.max_age, layer.max_age)
+            color_key = (cells_key, style_key, layer.age_palette, layer.rms_palette, layer.rms_mode,
+                         layer.blend_mode, layer.rms_enabled, layer.palette_mix)
+            alpha_mask, alpha_key = self._layer_alpha_mask(layer)
+            mix = getattr(layer, "blend_mode", getattr(layer, "mix", "normal"))
+            plan.append((layer, self._layer_color_cache(layer), cells_key, color_key,
+                         alpha_mask, alpha_key, mix))
+        frame_key = (BG_COLOR, tuple((cache, color_key, alpha_key, mix)
+                                     for _, cache, _, color_key, _, alpha_key, mix in plan))
+
+        if frame_key != self.renderer.frame_key:
+            self.renderer.clear(BG_COLOR)
+            self.renderer.frame_key = frame_key
+        else:
+            plan = []
+
         # Отрисовываем каждый слой
-        for i, layer in enumerate(layers):
-            live_cells = np.sum(layer.grid)
-            print(f"RENDER DEBUG: Layer {i} ({layer.rule}): {live_cells} live cells, solo={layer.solo}, mute={layer.mute}")
+        for i, (layer, cache, cells_key, color_key, alpha_mask, alpha_key, mix) in enumerate(plan):
             try:
-                img = build_color_image(layer.grid, layer.age, "Возраст + RMS", rms, pitch, cfg,
-                                        layer.age_palette, layer.rms_palette, layer.rms_mode, 
-                                        layer.blend_mode, layer.rms_enabled, layer.max_age, layer.palette_mix)
-                # --- Передаем маски возраста и живых клеток для alpha_old ---
-                self.renderer.last_age_mask = layer.age.copy()
-                self.renderer.last_grid_mask = layer.grid.copy()
-                self.renderer.last_max_age = layer.max_age
-                self.renderer.blit_layer(img, getattr(layer, "blend_mode", getattr(layer, "mix", "normal")), layer.alpha_live, layer.alpha_old)
+                # Альфа пересчитывается только после изменения сетки или альфа-настроек слоя
+                stale = getattr(layer, 'alpha_key', None) != alpha_key
+                if stale or cache.color_key != color_key:
+                    # Generations: живые клетки из grid плюс угасающие состояния
+                    state = getattr(layer, 'state', None)
+                    visible = layer.grid if state is None else layer.grid | (state >= 2)
+                    img = build_color_image(visible, layer.age, color_mode, rms_q, pitch, cfg,
+                                            layer.age_palette, layer.rms_palette, layer.rms_mode, 
+                                            layer.blend_mode, layer.rms_enabled, layer.max_age, layer.palette_mix,
+                                            regions=self._layer_tiles(layer).live_regions,
+                                            alpha_out=alpha_mask if stale else None,
+                                            alpha_live=layer.alpha_live, alpha_old=layer.alpha_old,
+                                            cache=cache, cells_key=cells_key)
+                    cache.color_key = color_key
+                    layer.alpha_key = alpha_key
+                else:
+                    img = cache.img
+                self.renderer.blit_layer(img, mix, layer.alpha_live, layer.alpha_old, alpha=alpha_mask)
             except Exception as e:
+                cache.invalidate()
+                self.renderer.frame_key = None
                 print(f"RENDER ERROR in layer {i}: {e}")
                 print(f"  Layer info: rule={layer.rule}, color_mode={layer.color_mode}")
                 print(f"  Palettes: age={layer.age_palette}, rms={layer.rms_palette}")
@@ -5067,25 +7058,10 @@ class App:
                 traceback.print_exc()
                 continue
                 
-        frame = self.renderer.canvas
-
-        # FX chain (включаемые опции из GUI)
-        if self.fx.get('trails', False):
-            apply_trails(frame, float(self.fx.get('trail_strength', 0.06)))
-        if self.fx.get('blur', False):
-            apply_scale_blur(frame, int(self.fx.get('blur_scale', 2)))
-        if self.fx.get('bloom', False):
-            apply_bloom(frame, float(self.fx.get('bloom_strength', 0.35)))
-        if self.fx.get('posterize', False):
-            apply_posterize(frame, int(self.fx.get('poster_levels', 5)))
-        if self.fx.get('dither', False):
-            apply_dither(frame)
-        if self.fx.get('scanlines', False):
-            apply_scanlines(frame, float(self.fx.get('scan_strength', 0.25)))
-        if self.fx.get('pixelate', False):
-            apply_pixelate(frame, int(self.fx.get('pixel_block', 1)))
-        if self.fx.get('outline', False):
-            apply_outline(frame, int(self.fx.get('outline_thick', 1)))
+        frame = self.renderer.present()
+
+        # FX chain (включаемые опции из GUI): одна блокировка canvas, поточечные слиты
+        self.fx_pipeline.apply(frame, self.fx)
 
         self.screen.blit(frame, (0, 0))
 
@@ -5211,11 +7187,17 @@ class App:
                     if 0 <= r < GRID_H and 0 <= c < GRID_W:
                         layer.grid[r, c] = True
                         layer.age[r, c] = 1
+                self._layer_tiles(layer).invalidate()
+                self._layer_stats(layer).invalidate()
+                touch_layer(layer)
     def clear_all_layers(self):
         """Очищает все слои"""
         for layer in self.layers:
             layer.grid.fill(False)
             layer.age.fill(0)
+            layer.state = None  # Иначе угасающие клетки Generations остаются видны
+            self._layer_stats(layer).population = 0
+            touch_layer(layer)
 
     def show_help(self):
         """Показывает справку по горячим клавишам"""
@@ -5230,6 +7212,7 @@ class App:
           C            - Очистить все слои
           R            - Рандомизировать слои (создать новые паттерны)
           T            - Создать тестовый паттерн
+          F            - Перемотать выбранный слой на 1024 поколения (HashLife)
           1-5          - Генерация 1-5 случайных слоев
           F4-F6        - Генерация пресетных конфигураций
           Ctrl+D       - Дублирование текущего слоя
@@ -5280,6 +7263,11 @@ class App:
                     layer.palette_mix = float(settings.get('palette_mix', getattr(layer, 'palette_mix', 0.5)))
                     layer.blend_mode = settings.get('blend_mode', getattr(layer, 'blend_mode', 'normal'))
                     layer.spawn_method = settings.get('spawn_method', getattr(layer, 'spawn_method', 'Стабильные блоки'))
+                    engine = settings.get('engine', getattr(layer, 'engine', 'dense'))
+                    layer.engine = engine if engine in CA_ENGINES else 'dense'
+                    topology = settings.get('topology', getattr(layer, 'topology', 'bounded'))
+                    layer.topology = topology if topology in CA_TOPOLOGIES else 'bounded'
+                    layer.tick_ms = max(0, int(settings.get('tick_ms', getattr(layer, 'tick_ms', 0)) or 0))
                     
         except FileNotFoundError:
             print("app_config.json not found, using default layer settings")
@@ -5304,7 +7292,10 @@ class App:
                     'mute': layer.mute,
                     'palette_mix': getattr(layer, 'palette_mix', 0.5),
                     'blend_mode': getattr(layer, 'blend_mode', 'normal'),
-                    'spawn_method': getattr(layer, 'spawn_method', 'Стабильные блоки')
+                    'spawn_method': getattr(layer, 'spawn_method', 'Стабильные блоки'),
+                    'engine': getattr(layer, 'engine', 'dense'),
+                    'topology': getattr(layer, 'topology', 'bounded'),
+                    'tick_ms': getattr(layer, 'tick_ms', 0)
                 }
                 layer_settings.append(settings)
             
@@ -5378,6 +7369,8 @@ class App:
                         self.clear_all_layers()
                     elif ev.key == pygame.K_t:
                         self.create_test_pattern()
+                    elif ev.key == pygame.K_f:
+                        self.fast_forward_layer(self.selected_layer_index)
                     elif ev.key == pygame.K_F3:
                         self.apply_joy_division()
                         self.hud.update_from_app(self)  # Обновляем HUD после изменений
@@ -5424,8 +7417,9 @@ class App:
             simulation_start = time.time()
             now = pygame.time.get_ticks()
             dyn_ms = self.maybe_tick_interval(pitch)
-            if now - self.last_tick >= dyn_ms:
-                self.last_tick = now
+            layer_steps = self.scheduled_steps(now, dyn_ms)
+            steps = max(layer_steps + [self.global_steps])
+            if steps:
                 births = int(SPAWN_BASE + SPAWN_SCALE *
                              clamp01(math.log10(1.0 + VOLUME_SCALE * max(0.0, rms))))
                 
@@ -5433,11 +7427,16 @@ class App:
                 # if births > 0 and rms > 0.001:
                 #     print(f"DEBUG: RMS={rms:.4f}, births={births}")
 
-                if rms <= self.sel.get('clear_rms', DEFAULT_CLEAR_RMS):
-                    self.soft_clear()
-                else:
-                    self.soft_recover()
-                self.update_layers(births)
+                for k in range(steps):
+                    # Слои, чьи часы ещё не дошли, этот шаг пропускают целиком
+                    due = [i for i, n in enumerate(layer_steps) if n > k]
+                    # Яркость (global_v_mul) затухает и восстанавливается по глобальным часам
+                    global_step = k < self.global_steps
+                    if rms <= self.sel.get('clear_rms', DEFAULT_CLEAR_RMS):
+                        self.soft_clear(due, fade=global_step)
+                    elif global_step:
+                        self.soft_recover()
+                    self.update_layers(births, due)
                 
                 # Убираем подсчет живых клеток на каждом тике для производительности
                 # total_alive = sum(np.sum(layer.grid) for layer in self.layers)
@@ -5464,11 +7463,14 @@ class App:
                 "RMS": f"{rms:.4f}",
                 "Pitch": f"{pitch:.1f} Hz" if pitch > 0 else "—",
                 "Tick": f"{dyn_ms} ms",
+                "Sim Rate": f"{self.sim_rate:.1f}/{1000.0 / max(1, dyn_ms):.1f} gen/s",
             }
             
             # Данные, которые обновляются реже (медленные расчеты)
             if current_time - self._info_last_update >= self._info_update_interval:
-                total_alive = sum(np.sum(layer.grid) for layer in self.layers)
+                total_alive = self.total_population()
+                births = sum(self._layer_stats(layer).births for layer in self.layers)
+                deaths = sum(self._layer_stats(layer).deaths for layer in self.layers)
                 
                 # Создаем информацию о альфа-значениях слоев
                 alpha_info = []
@@ -5477,6 +7479,7 @@ class App:
                 
                 self._cached_info.update({
                     "Alive": f"{total_alive} cells",
+                    "Births/Deaths": f"+{births} / -{deaths}",
                     "Layers": f"{len(self.layers)}",
                     "Max Age": f"{self.max_age}",
                     "Aging Speed": f"{self.aging_speed:.1f}x",
@@ -5537,10 +7540,21 @@ class App:
                 self._profile_counter += 1
             
             if self._profile_counter % 60 == 0:
+                # Попадания скалярного HSV-кэша и объём векторной конверсии за интервал
+                hsv_stats = hsv_cache_stats()
+                prev = getattr(self, '_hsv_stats_prev', None) or {k: 0 for k in hsv_stats}
+                self._hsv_stats_prev = hsv_stats
+                d_hits = hsv_stats['hits'] - prev['hits']
+                d_misses = hsv_stats['misses'] - prev['misses']
+                d_lookups = d_hits + d_misses
+                hsv_hit_rate = (d_hits / d_lookups * 100.0) if d_lookups else 100.0
+                d_vec = hsv_stats['array_pixels'] - prev['array_pixels']
                 print(f" PROFILE: Frame={frame_time*1000:.1f}ms, Events={event_time*1000:.1f}ms, "
                       f"Audio={audio_time*1000:.1f}ms, Sim={simulation_time*1000:.1f}ms, "
                       f"Render={render_time*1000:.1f}ms, HUD={hud_time*1000:.1f}ms, "
-                      f"Display={display_time*1000:.1f}ms, Clock={clock_time*1000:.1f}ms")
+                      f"Display={display_time*1000:.1f}ms, Clock={clock_time*1000:.1f}ms, "
+                      f"HSV cache={hsv_hit_rate:.0f}% of {d_lookups}, HSV vec={d_vec}, "
+                      f"Sim rate={self.sim_rate:.1f}/{1000.0 / max(1, dyn_ms):.1f} gen/s")
                       
         pygame.quit()
 
@@ -5560,7 +7574,7 @@ def main():
         # app.create_test_pattern()
             # continue
         for i, layer in enumerate(app.layers):
-            cells = np.sum(layer.grid)
+            cells = layer_population(layer)
         app.run()
     finally:
         try:
@@ -86,6 +86,7 @@ class ResourceManager:
             self.base_path / "config" / filename,
             self.base_path / "presets" / filename,
             self.base_path / "palettes" / filename,
+            self.base_path / "patterns" / filename,
             Path(filename)
         ]
         
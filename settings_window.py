@@ -165,7 +165,10 @@ class SettingsWindow:
                 status_lines = []
                 status_lines.append(f"Активных слоев: {len([l for l in self.app.layers if not getattr(l, 'mute', False)])}")
                 
-                total_cells = sum(np.sum(getattr(l, 'grid', np.array([]))) for l in self.app.layers)
+                if hasattr(self.app, 'total_population'):
+                    total_cells = self.app.total_population()
+                else:
+                    total_cells = sum(np.sum(getattr(l, 'grid', np.array([]))) for l in self.app.layers)
                 status_lines.append(f"Всего клеток: {total_cells}")
                 
                 if hasattr(self.app, '_profile_counter'):